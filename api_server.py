@@ -3,12 +3,24 @@ import sys
 import time
 import json
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Annotated
 import uuid
+import asyncio
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import itertools
+import shutil
+import stat
 import threading
-from queue import Queue
+import sqlite3
+import statistics
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 
 # Configure logging first
 logging.basicConfig(level=logging.INFO)
@@ -18,23 +30,113 @@ logger = logging.getLogger(__name__)
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root / "src"))
 
+# Grow allocator segments in place instead of fragmenting VRAM with fixed blocks,
+# which matters once CUDA graphs (VOXCPM_OPTIMIZE) pin their memory pools.
+# Must be set before torch initializes CUDA; an explicit setting wins.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
+# Inference dependencies are imported once here instead of inside every task
+try:
+    import torch
+    import numpy as np
+except ImportError as e:
+    logger.warning(f"Inference dependencies not available: {e}")
+    torch = np = None
+
+try:
+    from voxcpm.core import VoxCPM
+    from voxcpm.model.voxcpm import LoRAConfig
+except ImportError as e:
+    logger.warning(f"VoxCPM package not available: {e}")
+    VoxCPM = LoRAConfig = None
+
+try:
+    import lameenc
+except ImportError:
+    lameenc = None  # Required for MP3 output; checked where audio is encoded
+
 # Import FastAPI components
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+try:
+    import orjson  # noqa: F401 - required by ORJSONResponse
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+except ImportError:
+    DefaultJSONResponse = JSONResponse
+from pydantic import BaseModel, Field, PlainSerializer, TypeAdapter
 from contextlib import asynccontextmanager
 import uvicorn
 
 # Global variables - true multi-GPU approach
-task_queue = Queue()
-task_status: Dict[str, Dict] = {}
-task_lock = threading.Lock()
-worker_threads = []  # Multiple worker threads
+gpu_queues: Dict[int, asyncio.Queue] = {}  # Pending tasks for each GPU
+active_streams: Dict[int, int] = {}  # GPU -> sync streams submitted straight to its executor (event loop only)
+gpu_executors: Dict[int, ThreadPoolExecutor] = {}  # Single inference thread per GPU
+NUM_TASK_SHARDS = 16  # Task status is sharded so updates and polls rarely share a lock
+task_shards: List[Dict[str, "TaskState"]] = [{} for _ in range(NUM_TASK_SHARDS)]  # Unfinished tasks only
+task_db_path = os.environ.get("VOXCPM_TASK_DB", "tasks.db")  # SQLite store for all tasks
+task_db_local = threading.local()  # One SQLite connection per thread
+task_shard_locks = [threading.Lock() for _ in range(NUM_TASK_SHARDS)]
+worker_tasks = []  # Worker coroutines, one per GPU
+encoder_tasks = []  # MP3 encoder coroutines
+SHUTDOWN = object()  # Queue sentinel telling a worker to exit
+post_queue: Optional[asyncio.Queue] = None  # Generated audio waiting for MP3 encoding
+io_executor: Optional[ThreadPoolExecutor] = None  # Threads for MP3 encoding and file writes
+main_loop: Optional[asyncio.AbstractEventLoop] = None  # Event loop the workers run on
 current_models = {}  # Multiple model instances (GPU -> model)
 current_lora_paths = {}  # Track LoRA for each GPU
+lora_weight_caches: Dict[int, OrderedDict] = {}  # GPU -> LRU of LoRA name -> adapter tensors
+pinned_lora_buffers: Dict[int, Dict] = {}  # GPU -> parameter name -> pinned host staging buffer
+lora_copy_streams = {}  # GPU -> CUDA stream for LoRA uploads
+compute_streams = {}  # GPU -> CUDA stream for generation
+prompt_caches: Dict[int, OrderedDict] = {}  # GPU -> LRU of (path, mtime) -> encoded prompt audio features
+max_cached_prompts = int(os.environ.get("VOXCPM_MAX_CACHED_PROMPTS", "64"))
+max_cached_loras = int(os.environ.get("VOXCPM_MAX_CACHED_LORAS", "8"))
+lora_cache_min_free_bytes = int(os.environ.get("VOXCPM_LORA_CACHE_MIN_FREE_MB", "1024")) * 1024 * 1024
 model_locks = {}  # Separate lock for each GPU
+BASE_MODEL_PATH = str(project_root / "models" / "openbmb__VoxCPM1.5")  # Default model path
+speaker_disk_cache = os.environ.get("VOXCPM_SPEAKER_CACHE", "1") == "1"  # Persist prompt features in SPEAKER_CACHE_DIR
+pcm_scratch = threading.local()  # Per-thread float32/int16 buffers for PCM conversion
+OUTPUT_DIR = "api_outputs"  # Generated MP3 files, served by /download
+output_counter = itertools.count(1)  # Sequence numbers that keep output filenames unique
+RESULT_CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")  # Finished MP3s of deterministic (seeded) requests
+SPEAKER_CACHE_DIR = os.environ.get("VOXCPM_SPEAKER_CACHE_DIR",
+                                   os.path.join(OUTPUT_DIR, "speaker_cache"))  # <hash>.spk.pt encoded reference audio
+result_cache_max_bytes = int(float(os.environ.get("VOXCPM_RESULT_CACHE_GB", "10")) * 1024 ** 3)  # 0 disables
+result_cache = OrderedDict()  # Cache key -> file size, least recently used first
+result_cache_bytes = 0  # Total size of files in result_cache
+result_cache_lock = threading.Lock()
+pending_cache_keys = {}  # Task ID -> result cache key, stored once the task completes
+task_watchers: Dict[str, List[asyncio.Queue]] = {}  # Task ID -> queues receiving status snapshots (event loop only)
+task_feed_watchers: List[asyncio.Queue] = []  # Queues receiving every task's snapshots, for /ws/tasks
+FEED_FIELDS = ("status", "progress", "audio_path", "error")  # Fields /ws/tasks sends when they change
+AUDIO_HEADERS = {"Content-Encoding": "identity"}  # Keeps GZipMiddleware off MP3 responses
+lora_list_cache = {"root": None, "dirs": [], "signature": None, "entries": []}  # Cached /loras scan
 available_gpus = []  # List of available GPU devices
 max_concurrent_tasks = 2  # Number of GPUs for parallel processing
+optimize_model = os.environ.get("VOXCPM_OPTIMIZE", "0") == "1"  # torch.compile + CUDA graphs for LM/DiT steps
+allow_tf32 = os.environ.get("VOXCPM_ALLOW_TF32", "1") == "1"  # TF32 for float32 kernels (AudioVAE)
+cudnn_benchmark = os.environ.get("VOXCPM_CUDNN_BENCHMARK", "0") == "1"  # Autotune convs; pays off only for repeated shapes
+warmup_on_startup = os.environ.get("VOXCPM_WARMUP", "1") == "1"  # Load and exercise each GPU's model at startup
+prewarm_loras = os.environ.get("VOXCPM_PREWARM_LORAS", "1") == "1"  # Also upload LoRA adapters at startup
+model_dtype = os.environ.get("VOXCPM_DTYPE") or None  # bf16 | fp16 | fp32 override of config.json dtype
+model_quantize = os.environ.get("VOXCPM_QUANTIZE", "").lower()  # "int8" for torchao weight-only quantization
+max_queue_depth = int(os.environ.get("VOXCPM_QUEUE_DEPTH", "16"))  # Pending tasks per GPU before rejecting with 503
+avg_task_seconds: Optional[float] = None  # Moving average of GPU time per task, for ETAs
+recent_task_seconds = deque(maxlen=100)  # Latest task durations, for the p95 used in admission control
+target_latency_s = float(os.environ.get("VOXCPM_TARGET_LATENCY_S", "0"))  # Queue-wait SLA; 0 disables 429 admission
+task_ttl_s = float(os.environ.get("VOXCPM_TASK_TTL_S", "3600"))  # Purge finished task records after this; 0 keeps all
+
+def _shard_index(task_id: str) -> int:
+    return hash(task_id) & (NUM_TASK_SHARDS - 1)
+
+def snapshot_tasks() -> List[Dict]:
+    """Copy all task status entries, locking one shard at a time."""
+    tasks = []
+    for shard, lock in zip(task_shards, task_shard_locks):
+        with lock:
+            tasks.extend(task.to_dict() for task in shard.values())
+    return tasks
 
 # Task status constants
 class TaskStatus:
@@ -43,6 +145,122 @@ class TaskStatus:
     COMPLETED = "completed"
     FAILED = "failed"
 
+TASK_FIELDS = ("task_id", "status", "message", "progress", "created_at",
+               "updated_at", "estimated_time", "audio_path", "error")
+TASK_SUMMARY_FIELDS = ("task_id", "status", "progress", "updated_at")  # Default /tasks view
+
+# time.time() floats, formatted as ISO 8601 only when serialized
+Timestamp = Annotated[float, PlainSerializer(lambda t: datetime.fromtimestamp(t).isoformat(timespec="microseconds"), return_type=str)]
+
+@dataclass(slots=True)
+class TaskState:
+    """Status of an unfinished task; fields are updated in place under its shard lock."""
+    task_id: str
+    status: str
+    message: str
+    progress: float
+    created_at: Timestamp
+    updated_at: Timestamp
+    estimated_time: float
+    audio_path: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return task_state_adapter.dump_python(self, exclude_none=True)
+
+# Compiled pydantic-core serializer, instead of building the dict field by field
+task_state_adapter = TypeAdapter(TaskState)
+
+def _task_db() -> sqlite3.Connection:
+    """Return this thread's connection to the task database."""
+    conn = getattr(task_db_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(task_db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # WAL lets status polls read while a worker writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        task_db_local.conn = conn
+    return conn
+
+def init_task_db():
+    """Create the tasks table and fail tasks interrupted by a previous shutdown."""
+    conn = _task_db()
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_id TEXT PRIMARY KEY, status TEXT, message TEXT, progress REAL, "
+            "created_at TEXT, updated_at TEXT, estimated_time REAL, audio_path TEXT, error TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)")
+        # Serves /tasks?status=... as an index range scan, newest first
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_created_at ON tasks(status, created_at)")
+        # Fan-out of a /synthesize/batch request to its per-item tasks
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_batches ("
+            "multi_task_id TEXT PRIMARY KEY, task_ids TEXT, created_at TEXT)"
+        )
+        conn.execute(
+            "UPDATE tasks SET status = ?, message = ?, error = ? WHERE status IN (?, ?)",
+            (TaskStatus.FAILED, "服务重启，任务中断", "Server restarted before the task finished",
+             TaskStatus.PENDING, TaskStatus.PROCESSING)
+        )
+
+def save_task(task: Dict, replace: bool = True):
+    """Insert or overwrite a task row; with ``replace=False`` an existing row is kept."""
+    conn = _task_db()
+    with conn:
+        conn.execute(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO tasks ({', '.join(TASK_FIELDS)}) "
+            f"VALUES ({', '.join('?' * len(TASK_FIELDS))})",
+            tuple(task.get(field) for field in TASK_FIELDS)
+        )
+
+def _row_to_task(row: sqlite3.Row) -> Dict:
+    return {key: row[key] for key in row.keys() if row[key] is not None}
+
+def load_task(task_id: str) -> Optional[Dict]:
+    row = _task_db().execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+    return _row_to_task(row) if row is not None else None
+
+def purge_finished_tasks(max_age_s: float) -> int:
+    """Delete finished tasks last updated more than ``max_age_s`` ago, and batches as old."""
+    cutoff = datetime.fromtimestamp(time.time() - max_age_s).isoformat(timespec="microseconds")
+    conn = _task_db()
+    with conn:
+        cursor = conn.execute(
+            "DELETE FROM tasks WHERE status IN (?, ?) AND updated_at < ?",
+            (TaskStatus.COMPLETED, TaskStatus.FAILED, cutoff)
+        )
+        conn.execute("DELETE FROM task_batches WHERE created_at < ?", (cutoff,))
+    return cursor.rowcount
+
+def save_task_batch(multi_task_id: str, task_ids: List[str]):
+    conn = _task_db()
+    with conn:
+        conn.execute(
+            "INSERT INTO task_batches (multi_task_id, task_ids, created_at) VALUES (?, ?, ?)",
+            (multi_task_id, json.dumps(task_ids), datetime.now().isoformat(timespec="microseconds"))
+        )
+
+def load_task_batch(multi_task_id: str) -> Optional[List[str]]:
+    row = _task_db().execute(
+        "SELECT task_ids FROM task_batches WHERE multi_task_id = ?", (multi_task_id,)
+    ).fetchone()
+    return json.loads(row["task_ids"]) if row is not None else None
+
+def query_tasks(status: Optional[str], limit: int) -> List[Dict]:
+    """Newest tasks first, optionally filtered by status."""
+    if status:
+        rows = _task_db().execute(
+            "SELECT * FROM tasks WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+        ).fetchall()
+    else:
+        rows = _task_db().execute(
+            "SELECT * FROM tasks ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [_row_to_task(row) for row in rows]
+
 # Pydantic models
 class TTSRequest(BaseModel):
     text: str
@@ -54,79 +272,150 @@ class TTSRequest(BaseModel):
     ref_text: Optional[str] = None
     async_mode: bool = True
 
+class TTSBatchRequest(BaseModel):
+    items: List[TTSRequest] = Field(min_length=1)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    global worker_threads, max_concurrent_tasks, available_gpus, model_locks
+    global worker_tasks, encoder_tasks, max_concurrent_tasks, available_gpus, model_locks
+    global post_queue, io_executor, main_loop
 
     # Startup
     logger.info("Starting VoxCPM API server...")
 
+    # GPU workers only run Python in parallel on a free-threaded (PEP 703) build
+    gil_check = getattr(sys, "_is_gil_enabled", None)
+    if gil_check is None or gil_check():
+        logger.warning("GIL is enabled; Python-level work of GPU workers will be serialized. "
+                       "Use a free-threaded Python build (3.13t+) for parallel multi-GPU processing")
+    else:
+        logger.info("Running on free-threaded Python, GIL is disabled")
+
+    init_task_db()
+    configure_torch_backends()
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if speaker_disk_cache:
+        os.makedirs(SPEAKER_CACHE_DIR, exist_ok=True)
+    load_result_cache()
+
     # Detect available GPUs
     available_gpus = detect_available_gpus()
     max_concurrent_tasks = len(available_gpus)
 
-    # Initialize locks for each GPU
+    # Initialize locks, queues and inference executors for each GPU
     for gpu_id in available_gpus:
         model_locks[gpu_id] = threading.Lock()
+        gpu_queues[gpu_id] = asyncio.Queue(maxsize=max_queue_depth)
+        gpu_executors[gpu_id] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"gpu{gpu_id}")
 
     logger.info(f"Detected {len(available_gpus)} GPUs: {available_gpus}")
-    logger.info(f"Starting {max_concurrent_tasks} worker threads for true parallel processing")
-
-    # Start multiple worker threads, each bound to a specific GPU
-    for i in range(max_concurrent_tasks):
-        gpu_id = available_gpus[i]
-        worker_thread = threading.Thread(target=task_worker, args=(i, gpu_id), daemon=True)
-        worker_thread.start()
-        worker_threads.append(worker_thread)
+    logger.info(f"Starting {max_concurrent_tasks} workers for true parallel processing")
+
+    # Start one worker coroutine per GPU, each feeding its own inference thread
+    for i, gpu_id in enumerate(available_gpus):
+        worker_tasks.append(asyncio.create_task(task_worker(i, gpu_id)))
         logger.info(f"Background task worker {i} started for GPU {gpu_id}")
 
+    # Warm up on each GPU's own executor so real tasks queue behind it instead of racing it
+    if warmup_on_startup:
+        loop = asyncio.get_running_loop()
+        for gpu_id in available_gpus:
+            loop.run_in_executor(gpu_executors[gpu_id], warmup_gpu, gpu_id, None, prewarm_loras)
+
+    # Start encoder workers so MP3 encoding of one task overlaps generation of the next
+    main_loop = asyncio.get_running_loop()
+    post_queue = asyncio.Queue()
+    num_encoders = max(2, max_concurrent_tasks)
+    io_executor = ThreadPoolExecutor(max_workers=num_encoders, thread_name_prefix="encoder")
+    for i in range(num_encoders):
+        encoder_tasks.append(asyncio.create_task(encoder_worker(i)))
+
+    purge_task = asyncio.create_task(purge_expired_tasks()) if task_ttl_s > 0 else None
+
     yield
 
     # Shutdown
     logger.info("Shutting down VoxCPM API server...")
+    # Workers exit when they reach the sentinel; GPU workers go first so their
+    # last results still reach the encoders. Tasks not yet started are failed
+    # so the bounded queues have room for the sentinel.
+    for queue in gpu_queues.values():
+        while not queue.empty():
+            task_id, _ = queue.get_nowait()
+            queue.task_done()
+            update_task_status_safe(task_id, TaskStatus.FAILED, message="服务关闭，任务已取消",
+                                    error="Server shut down before the task started")
+        queue.put_nowait(SHUTDOWN)
+    await stop_workers(worker_tasks)
+    if purge_task is not None:
+        purge_task.cancel()
+        await asyncio.gather(purge_task, return_exceptions=True)
+    for _ in encoder_tasks:
+        post_queue.put_nowait(SHUTDOWN)
+    await stop_workers(encoder_tasks)
+    for executor in gpu_executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    if io_executor is not None:
+        io_executor.shutdown(wait=False, cancel_futures=True)
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
     title="VoxCPM LoRA TTS API (Multi-GPU)",
     description="VoxCPM TTS API with multi-GPU support",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse
 )
 
-def detect_available_gpus():
-    """Detect available GPU devices."""
+# Gzip JSON responses. MP3 is already compressed and streamed, so audio responses
+# carry AUDIO_HEADERS, and GZipMiddleware passes through anything with a Content-Encoding
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+KFD_TOPOLOGY_NODES = "/sys/class/kfd/kfd/topology/nodes"
+
+@functools.lru_cache(maxsize=1)
+def configure_torch_backends():
+    """Apply process-wide kernel selection settings before any model is loaded."""
+    if torch is None or not torch.cuda.is_available():
+        return
+    # LM/DiT weights already load in the config dtype (bfloat16); let the
+    # float32 AudioVAE convolutions and matmuls use TF32 tensor cores too
+    if allow_tf32:
+        torch.set_float32_matmul_precision("high")
+        torch.backends.cudnn.allow_tf32 = True
+    # Audio lengths vary per request, so autotuning every new conv shape is opt-in
+    torch.backends.cudnn.benchmark = cudnn_benchmark
+
+@functools.lru_cache(maxsize=1)
+def detect_available_gpus() -> List[int]:
+    """Detect available GPU devices; probed once per process."""
+    if torch is not None:
+        # device_count() also covers ROCm (HIP) builds of PyTorch
+        count = torch.cuda.device_count() if torch.cuda.is_available() else 0
+        if count:
+            return list(range(count))
+    else:
+        logger.warning("PyTorch not available, probing AMD KFD topology")
+
+    # AMD driver topology: CPU nodes report gpu_id 0, GPU nodes a non-zero id
+    gpu_ids = []
     try:
-        import torch
-        if torch.cuda.is_available():
-            return list(range(torch.cuda.device_count()))
-        else:
-            # For AMD GPUs, check for ROCm devices
-            try:
-                import subprocess
-                result = subprocess.run(["rocm-smi", "--showid"], capture_output=True, text=True)
-                if result.returncode == 0:
-                    # Parse ROCm output to get GPU IDs
-                    gpu_ids = []
-                    for line in result.stdout.split('\n'):
-                        if 'GPU' in line and 'Device' in line:
-                            # Extract GPU ID from ROCm output
-                            parts = line.split()
-                            for part in parts:
-                                if part.isdigit():
-                                    gpu_ids.append(int(part))
-                                    break
-                    return gpu_ids if gpu_ids else [0, 1]  # Default to 2 GPUs for AMD
-            except:
-                pass
-
-            # Default fallback
-            logger.warning("Could not detect GPUs, defaulting to 2 workers")
-            return [0, 1]
+        nodes = sorted(os.listdir(KFD_TOPOLOGY_NODES), key=lambda n: int(n) if n.isdigit() else -1)
+    except OSError:
+        nodes = []
+    for node in nodes:
+        try:
+            with open(os.path.join(KFD_TOPOLOGY_NODES, node, "gpu_id")) as f:
+                if int(f.read().strip() or 0):
+                    gpu_ids.append(len(gpu_ids))
+        except (OSError, ValueError):
+            continue
+    if gpu_ids:
+        logger.warning(f"torch.cuda reports no devices, but KFD lists {len(gpu_ids)} AMD GPU(s)")
+        return gpu_ids
 
-    except ImportError:
-        logger.warning("PyTorch not available, defaulting to 2 workers")
-        return [0, 1]
+    raise RuntimeError("No GPU devices detected; VoxCPM API server requires at least one GPU")
 
 @app.get("/")
 async def root():
@@ -153,59 +442,258 @@ async def health_check():
         "max_concurrent_tasks": max_concurrent_tasks
     }
 
+@app.get("/warmup")
+async def warmup(lora: Optional[str] = None):
+    """Load ``lora`` (or the base model) on every GPU and run a tiny generation.
+
+    Runs on each GPU's inference thread, so it waits behind queued tasks.
+    Clients call it once before timing requests to exclude cold start.
+    """
+    if lora and lora != "None" and not await asyncio.to_thread(os.path.exists, os.path.join("lora", lora)):
+        raise HTTPException(status_code=404, detail=f"LoRA model '{lora}' not found")
+
+    started = time.monotonic()
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(gpu_executors[gpu_id], warmup_gpu, gpu_id, lora)
+        for gpu_id in available_gpus
+    ))
+    return {
+        "lora": lora,
+        "warmed_gpus": [gpu_id for gpu_id, ok in zip(available_gpus, results) if ok],
+        "failed_gpus": [gpu_id for gpu_id, ok in zip(available_gpus, results) if not ok],
+        "seconds": round(time.monotonic() - started, 2)
+    }
+
+def _dir_signature(dirs: List[str]) -> tuple:
+    signature = []
+    for d in dirs:
+        try:
+            signature.append(os.stat(d).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def scan_lora_checkpoints(lora_dir: str = "lora") -> List[str]:
+    """Return LoRA checkpoint directories, rescanning only when the tree changes.
+
+    Adding or removing an entry updates its parent directory's mtime, so
+    comparing directory mtimes (one stat per directory) detects any change
+    without stat-ing every file on each request.
+    """
+    cache = lora_list_cache
+    if cache["root"] == lora_dir and _dir_signature(cache["dirs"]) == cache["signature"]:
+        return cache["entries"]
+
+    # scandir reports entry types from the directory listing itself, so unlike
+    # os.walk + os.path checks this needs no per-file stat
+    dirs = []
+    checkpoints = []
+    pending = [lora_dir]
+    while pending:
+        root = pending.pop()
+        dirs.append(root)
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        pending.append(entry.path)
+                    elif entry.name == "lora_weights.safetensors":
+                        checkpoints.append(os.path.relpath(root, lora_dir))
+        except OSError:
+            continue
+
+    cache.update(root=lora_dir, dirs=dirs, signature=_dir_signature(dirs),
+                 entries=sorted(checkpoints, reverse=True))
+    return cache["entries"]
+
 @app.get("/loras")
 async def list_loras():
     """List available LoRA models."""
     try:
         lora_dir = "lora"
-        if not os.path.exists(lora_dir):
+        if not os.path.isdir(lora_dir):
             return {"loras": [], "count": 0}
 
-        checkpoints = []
-        for root, dirs, files in os.walk(lora_dir):
-            if "lora_weights.safetensors" in files:
-                rel_path = os.path.relpath(root, lora_dir)
-                checkpoints.append(rel_path)
-
-        return {"loras": sorted(checkpoints, reverse=True), "count": len(checkpoints)}
+        # Keep the filesystem scan off the event loop
+        checkpoints = await asyncio.to_thread(scan_lora_checkpoints, lora_dir)
+        return {"loras": checkpoints, "count": len(checkpoints)}
     except Exception as e:
         logger.error(f"Error listing LoRAs: {e}")
         return {"loras": [], "count": 0, "error": str(e)}
 
-@app.post("/synthesize")
-async def synthesize_speech(request: TTSRequest):
-    """Synthesize speech endpoint with real model support."""
-    try:
-        # Validate LoRA name if provided
-        if request.lora_name and request.lora_name != "None":
-            lora_path = os.path.join("lora", request.lora_name)
-            if not os.path.exists(lora_path):
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"LoRA model '{request.lora_name}' not found"
-                )
-
-        # Generate task ID
-        task_id = str(uuid.uuid4())[:8]
-        estimated_time = max(len(request.text) * 0.3 + request.steps, 30)
+def estimate_task_seconds(request: TTSRequest) -> float:
+    """Expected GPU time for one task, from measured history when available."""
+    if avg_task_seconds is not None:
+        return avg_task_seconds
+    return max(len(request.text) * 0.3 + request.steps, 30)
+
+async def validate_lora_name(request: TTSRequest):
+    """Raise 404 if the requested LoRA does not exist."""
+    if request.lora_name and request.lora_name != "None":
+        lora_path = os.path.join("lora", request.lora_name)
+        if not await asyncio.to_thread(os.path.exists, lora_path):
+            raise HTTPException(
+                status_code=404,
+                detail=f"LoRA model '{request.lora_name}' not found"
+            )
 
-        # Initialize task status
-        with task_lock:
-            task_status[task_id] = {
-                "task_id": task_id,
-                "status": TaskStatus.PENDING,
-                "message": "任务已提交，等待处理...",
-                "progress": 0.0,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-                "estimated_time": estimated_time
-            }
+def _log_task_save_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error saving task: {future.exception()}")
+
+def register_task(task_id: str, estimated_time: float):
+    """Record a new pending task in memory and in the task database; call from the event loop.
+
+    Does not await, so ``enqueue_task`` stays atomic. The row is inserted on a
+    worker thread and never overwrites, so a task that finishes first keeps
+    its final row.
+    """
+    now = time.time()
+    task = TaskState(
+        task_id=task_id,
+        status=TaskStatus.PENDING,
+        message="任务已提交，等待处理...",
+        progress=0.0,
+        created_at=now,
+        updated_at=now,
+        estimated_time=estimated_time
+    )
+    asyncio.get_running_loop().run_in_executor(
+        None, save_task, task.to_dict(), False).add_done_callback(_log_task_save_error)
+    shard = _shard_index(task_id)
+    with task_shard_locks[shard]:
+        task_shards[shard][task_id] = task
+    if task_feed_watchers:
+        publish_task_update(task.to_dict())
+
+async def stream_response(request: TTSRequest, cache_key: Optional[str] = None) -> StreamingResponse:
+    """Stream MP3 chunks from the least loaded GPU as they are generated.
+
+    The stream passes the same admission control as queued tasks. The 200
+    is only sent once the first chunk exists, so failures while loading the
+    model or preparing the prompt return a 500. A failure after that aborts
+    the connection instead of ending the body cleanly.
+    """
+    task_id = str(uuid.uuid4())[:8]
+    gpu_id, estimated_time = admit_task(request)
+    register_task(task_id, estimated_time)
+    if cache_key:
+        pending_cache_keys[task_id] = cache_key
+    chunks = stream_synthesis(task_id, request.model_dump(), gpu_id)
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        await asyncio.to_thread(update_task_status_safe, task_id, TaskStatus.FAILED,
+                                message="Task failed: no audio generated", error="no audio generated")
+        raise HTTPException(status_code=500, detail="Synthesis failed: no audio generated")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Synthesis failed: {str(e)}")
 
-        if request.async_mode:
-            # Add to queue without blocking
-            task_queue.put((task_id, request.model_dump()))
-            logger.info(f"Task {task_id} queued for async processing")
+    async def body():
+        yield first_chunk
+        async for data in chunks:
+            yield data
+
+    return StreamingResponse(body(), media_type="audio/mpeg", headers={**AUDIO_HEADERS, "X-Task-Id": task_id})
+
+def gpu_load(gpu_id: int) -> int:
+    """Tasks waiting for or holding a GPU: its queue plus streams running outside it."""
+    return gpu_queues[gpu_id].qsize() + active_streams.get(gpu_id, 0)
+
+def admit_task(request: TTSRequest) -> tuple:
+    """Pick the least loaded GPU for a new task. Returns ``(gpu_id, estimated_time)``.
+
+    Raises 503 when every GPU is at the queue depth and 429 when the
+    expected wait exceeds the latency target. Queued tasks and sync streams
+    both go through here, so streams count toward backpressure.
+    """
+    estimated_time = estimate_task_seconds(request)
+
+    # Dispatch to the least loaded GPU, rejecting when every one is full
+    gpu_id = min(gpu_queues, key=gpu_load)
+    load = gpu_load(gpu_id)
+    if max_queue_depth > 0 and load >= max_queue_depth:
+        raise HTTPException(status_code=503, detail="Task queue is full, retry later",
+                            headers={"Retry-After": str(max(1, int(estimated_time)))})
+    # Little's law: the wait ahead of this task is queue length times per-task latency
+    p95 = p95_task_seconds()
+    if target_latency_s > 0 and p95 is not None:
+        estimated_wait = load * p95
+        if estimated_wait > target_latency_s * 1.5:
+            raise HTTPException(status_code=429, detail="Server overloaded, retry later",
+                                headers={"Retry-After": str(max(1, int(estimated_wait - target_latency_s)))})
+    return gpu_id, estimated_time * (load + 1)
+
+def enqueue_task(request: TTSRequest, cache_key: Optional[str] = None) -> tuple:
+    """Admit a task to the least loaded GPU's queue. Returns ``(task_id, estimated_time)``.
+
+    Does not await, so the queue cannot fill up between the checks and the put.
+    """
+    task_id = str(uuid.uuid4())[:8]
+    gpu_id, estimated_time = admit_task(request)
+    queue = gpu_queues[gpu_id]
+
+    register_task(task_id, estimated_time)
+    if cache_key:
+        pending_cache_keys[task_id] = cache_key
+    queue.put_nowait((task_id, request.model_dump()))
+    logger.info(f"Task {task_id} queued for async processing on GPU {gpu_id}")
+    return task_id, estimated_time
+
+async def register_cached_result(cached_path: str) -> tuple:
+    """Record a completed task for a result cache hit. Returns ``(task_id, output_path)``.
+
+    The cached MP3 is hard-linked into the output directory, so ``/task``,
+    ``/download`` and ``/cleanup`` treat it like any other result.
+    """
+    task_id = str(uuid.uuid4())[:8]
+    output_path = make_output_path(task_id)
+    await asyncio.to_thread(link_or_copy, cached_path, output_path)
+    register_task(task_id, 0.0)
+    await asyncio.to_thread(update_task_status_safe, task_id, TaskStatus.COMPLETED, progress=1.0,
+                            message="语音合成完成 (缓存命中)", audio_path=output_path)
+    logger.info(f"Task {task_id} served from result cache")
+    return task_id, output_path
+
+async def cached_result_response(cached_path: str, etag: str, request: TTSRequest, stream: bool):
+    """Answer a synthesis request from the result cache without touching a GPU."""
+    task_id, output_path = await register_cached_result(cached_path)
+    headers = {"ETag": etag, "X-Task-Id": task_id}
+    if stream or not request.async_mode:
+        return FileResponse(output_path, media_type="audio/mpeg", headers={**AUDIO_HEADERS, **headers})
+    return DefaultJSONResponse({
+        "task_id": task_id,
+        "status": TaskStatus.COMPLETED,
+        "message": "命中缓存，音频已生成",
+        "estimated_time": 0.0,
+        "progress": 1.0,
+        "audio_path": output_path
+    }, headers=headers)
 
+@app.post("/synthesize")
+async def synthesize_speech(request: TTSRequest, stream: bool = False,
+                            if_none_match: Optional[str] = Header(None)):
+    """Synthesize speech endpoint with real model support.
+
+    ``?stream=1`` returns the MP3 as it is generated even when ``async_mode`` is set.
+    Requests with a fixed seed are served from the result cache; their ETag
+    is the cache key, and a matching ``If-None-Match`` gets a 304.
+    """
+    try:
+        await validate_lora_name(request)
+
+        cache_key = await asyncio.to_thread(result_cache_key, request)
+        if cache_key:
+            etag = f'"{cache_key}"'
+            cached_path = await asyncio.to_thread(lookup_cached_result, cache_key)
+            if cached_path is not None:
+                if etag in (if_none_match or ""):
+                    return Response(status_code=304, headers={"ETag": etag})
+                return await cached_result_response(cached_path, etag, request, stream)
+
+        if request.async_mode and not stream:
+            task_id, estimated_time = enqueue_task(request, cache_key)
             return {
                 "task_id": task_id,
                 "status": "submitted",
@@ -214,17 +702,13 @@ async def synthesize_speech(request: TTSRequest):
                 "progress": 0.0
             }
         else:
-            # For sync mode, process immediately on first available GPU
-            gpu_id = available_gpus[0] if available_gpus else 0
-            result = process_task_real(task_id, request.model_dump(), 0, gpu_id)
+            if lameenc is None:
+                raise HTTPException(status_code=501, detail="Sync streaming mode requires lameenc")
 
-            return {
-                "task_id": task_id,
-                "status": result.get("status", "unknown"),
-                "message": result.get("message", ""),
-                "audio_path": result.get("audio_path"),
-                "progress": result.get("progress", 0)
-            }
+            response = await stream_response(request, cache_key)
+            if cache_key:
+                response.headers["ETag"] = etag
+            return response
 
     except HTTPException:
         raise
@@ -232,111 +716,460 @@ async def synthesize_speech(request: TTSRequest):
         logger.error(f"Error during synthesis: {e}")
         raise HTTPException(status_code=500, detail=f"Synthesis failed: {str(e)}")
 
+@app.post("/synthesize/stream")
+async def synthesize_speech_stream(request: TTSRequest):
+    """Always stream MP3 audio as it is generated, ignoring ``async_mode``."""
+    try:
+        await validate_lora_name(request)
+        if lameenc is None:
+            raise HTTPException(status_code=501, detail="Streaming requires lameenc")
+
+        return await stream_response(request)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during streaming synthesis: {e}")
+        raise HTTPException(status_code=500, detail=f"Synthesis failed: {str(e)}")
+
+@app.post("/synthesize/batch")
+async def synthesize_batch(batch: TTSBatchRequest):
+    """Submit several async tasks in one request.
+
+    Each item becomes its own task, dispatched like a single ``/synthesize``
+    call; workers already coalesce queued tasks that share a LoRA. Items the
+    queues cannot take are reported as rejected instead of failing the batch. The returned
+    ``multi_task_id`` tracks all admitted tasks via ``/batch/{multi_task_id}``.
+    """
+    for request in batch.items:
+        await validate_lora_name(request)
+
+    results = []
+    for request in batch.items:
+        try:
+            cache_key = await asyncio.to_thread(result_cache_key, request)
+            cached_path = await asyncio.to_thread(lookup_cached_result, cache_key) if cache_key else None
+            if cached_path is not None:
+                task_id, output_path = await register_cached_result(cached_path)
+                results.append({"task_id": task_id, "status": TaskStatus.COMPLETED,
+                                "estimated_time": 0.0, "audio_path": output_path})
+                continue
+            task_id, estimated_time = enqueue_task(request, cache_key)
+            results.append({"task_id": task_id, "status": "submitted", "estimated_time": estimated_time})
+        except HTTPException as e:
+            results.append({"task_id": None, "status": "rejected", "status_code": e.status_code,
+                            "detail": e.detail})
+
+    multi_task_id = str(uuid.uuid4())[:8]
+    task_ids = [item["task_id"] for item in results if item["task_id"]]
+    await asyncio.to_thread(save_task_batch, multi_task_id, task_ids)
+    return {
+        "multi_task_id": multi_task_id,
+        "message": f"已提交 {len(task_ids)}/{len(results)} 个任务",
+        "tasks": results
+    }
+
+@app.get("/batch/{multi_task_id}")
+async def get_batch_status(multi_task_id: str, response: Response,
+                           if_none_match: Optional[str] = Header(None)):
+    """Status of every task in a batch, with the overall status and mean progress.
+
+    The ETag changes whenever any task in the batch updates; a matching
+    ``If-None-Match`` gets a bodiless 304.
+    """
+    task_ids = await asyncio.to_thread(load_task_batch, multi_task_id)
+    if task_ids is None:
+        raise HTTPException(status_code=404, detail=f"Batch {multi_task_id} not found")
+
+    tasks = [task for task in await asyncio.gather(*(get_task_snapshot(t) for t in task_ids))
+             if task is not None]
+    etag = '"%s"' % hashlib.blake2b("".join(map(task_etag, tasks)).encode(), digest_size=16).hexdigest()
+    if etag in (if_none_match or ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    statuses = {task["status"] for task in tasks}
+    if statuses & {TaskStatus.PENDING, TaskStatus.PROCESSING}:
+        status = TaskStatus.PROCESSING
+    elif TaskStatus.FAILED in statuses:
+        status = TaskStatus.FAILED
+    else:
+        status = TaskStatus.COMPLETED
+    return {
+        "multi_task_id": multi_task_id,
+        "status": status,
+        "progress": sum(task.get("progress", 0.0) for task in tasks) / len(tasks) if tasks else 1.0,
+        "tasks": tasks
+    }
+
+@app.websocket("/synthesize/ws")
+async def synthesize_ws(websocket: WebSocket):
+    """Submit a task and receive its status updates, then the MP3 bytes, over one connection.
+
+    The client sends one TTSRequest as JSON. The server replies with a
+    "submitted" frame, a JSON frame per status change, and, on success, the
+    MP3 file as a binary frame before closing.
+    """
+    await websocket.accept()
+    try:
+        try:
+            request = TTSRequest(**await websocket.receive_json())
+            await validate_lora_name(request)
+            task_id, estimated_time = enqueue_task(request)
+        except HTTPException as e:
+            await websocket.send_json({"status": "rejected", "status_code": e.status_code, "error": e.detail})
+            await websocket.close()
+            return
+        except WebSocketDisconnect:
+            raise
+        except Exception as e:
+            await websocket.send_json({"status": "rejected", "status_code": 422, "error": str(e)})
+            await websocket.close()
+            return
+
+        # Subscribing before the first await: the worker cannot pick the task up earlier
+        watcher = watch_task(task_id)
+        try:
+            await websocket.send_json({"task_id": task_id, "status": "submitted",
+                                       "estimated_time": estimated_time, "progress": 0.0})
+            while True:
+                task = await watcher.get()
+                await websocket.send_json(task)
+                if task["status"] in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                    break
+        finally:
+            unwatch_task(task_id, watcher)
+
+        audio_path = task.get("audio_path")
+        if task["status"] == TaskStatus.COMPLETED and audio_path:
+            audio = await asyncio.to_thread(Path(audio_path).read_bytes)
+            await websocket.send_bytes(audio)
+        await websocket.close()
+    except WebSocketDisconnect:
+        # The task keeps running; the client can still poll /task/{task_id}
+        pass
+
+@app.websocket("/ws/tasks")
+async def task_feed_ws(websocket: WebSocket, task_ids: Optional[str] = None):
+    """Push task status changes as ``{"task_id": ..., <changed FEED_FIELDS>}`` frames.
+
+    ``task_ids`` (comma-separated) limits the feed to those tasks; their
+    current state, finished or not, is sent first. Without it, every live
+    task is sent on connect and every task afterwards.
+    """
+    await websocket.accept()
+    wanted = set(filter(None, task_ids.split(","))) if task_ids else None
+    # Subscribe before reading current state so an update in between is not missed
+    watcher = asyncio.Queue()
+    task_feed_watchers.append(watcher)
+    last_sent: Dict[str, Dict] = {}
+
+    async def send_delta(task: Dict):
+        task_id = task["task_id"]
+        if wanted is not None and task_id not in wanted:
+            return
+        previous = last_sent.get(task_id, {})
+        delta = {field: task.get(field) for field in FEED_FIELDS if task.get(field) != previous.get(field)}
+        if task["status"] in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+            last_sent.pop(task_id, None)
+        else:
+            last_sent[task_id] = {field: task.get(field) for field in FEED_FIELDS}
+        if delta:
+            await websocket.send_json({"task_id": task_id, **delta})
+
+    async def wait_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # The feed only sends, so a reader is needed to notice the client leaving
+    closed = asyncio.create_task(wait_disconnect())
+    try:
+        if wanted is None:
+            current = snapshot_tasks()
+        else:
+            current = [task for task in await asyncio.gather(*(get_task_snapshot(t) for t in wanted))
+                       if task is not None]
+        for task in current:
+            await send_delta(task)
+        while not closed.done():
+            update = asyncio.create_task(watcher.get())
+            await asyncio.wait((update, closed), return_when=asyncio.FIRST_COMPLETED)
+            if update.done():
+                await send_delta(update.result())
+            else:
+                update.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        task_feed_watchers.remove(watcher)
+
+async def get_task_snapshot(task_id: str) -> Optional[Dict]:
+    shard = _shard_index(task_id)
+    with task_shard_locks[shard]:
+        task_info = task_shards[shard].get(task_id)
+        task_info = task_info.to_dict() if task_info is not None else None
+    if task_info is None:
+        task_info = await asyncio.to_thread(load_task, task_id)
+    return task_info
+
 @app.get("/task/{task_id}")
-async def get_task_status(task_id: str):
-    """Get status of a specific task."""
-    with task_lock:
-        if task_id not in task_status:
+async def get_task_status(task_id: str, response: Response,
+                          if_none_match: Optional[str] = Header(None)):
+    """Get status of a specific task.
+
+    Pollers send the last ETag as ``If-None-Match``; an unchanged task gets a bodiless 304.
+    """
+    task_info = await get_task_snapshot(task_id)
+    if task_info is None:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    etag = task_etag(task_info)
+    if etag in (if_none_match or ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return task_info
+
+def task_etag(task: Dict) -> str:
+    """Version tag of a task snapshot; changes on every status update."""
+    return f'"{task["task_id"]}-{task.get("updated_at", "")}"'
+
+@app.get("/task/{task_id}/wait")
+async def wait_task_status(task_id: str, response: Response, since: Optional[str] = None,
+                           timeout: float = 25.0):
+    """Long-poll a task: return once its ETag differs from ``since`` or after ``timeout`` seconds.
+
+    Clients pass the ETag of the last response as ``since``; finished tasks
+    return immediately.
+    """
+    # Subscribe before reading so an update between the two is not missed
+    watcher = watch_task(task_id)
+    try:
+        task_info = await get_task_snapshot(task_id)
+        if task_info is None:
             raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
 
-        task_info = task_status[task_id].copy()
-        return task_info
+        finished = task_info["status"] in (TaskStatus.COMPLETED, TaskStatus.FAILED)
+        if not finished and task_etag(task_info) == since:
+            try:
+                task_info = await asyncio.wait_for(watcher.get(), timeout=min(max(timeout, 0.0), 60.0))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        unwatch_task(task_id, watcher)
+
+    response.headers["ETag"] = task_etag(task_info)
+    return task_info
 
 @app.get("/tasks")
-async def list_tasks(status: Optional[str] = None, limit: int = 50):
-    """List all tasks."""
-    with task_lock:
-        tasks = list(task_status.values())
-        if status:
-            tasks = [task for task in tasks if task["status"] == status]
-        tasks.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        tasks = tasks[:limit]
-
-        processing_count = sum(1 for task in task_status.values() if task["status"] == "processing")
-
-        return {
-            "tasks": tasks,
-            "total": len(tasks),
-            "processing": processing_count,
-            "max_concurrent": max_concurrent_tasks,
-            "available_gpus": len(available_gpus)
-        }
+async def list_tasks(status: Optional[str] = None, limit: int = 50, full: bool = False):
+    """List all tasks.
+
+    Each task is summarized as ``TASK_SUMMARY_FIELDS``; ``?full=1`` returns
+    complete records.
+    """
+    # Unfinished tasks live in memory; their database rows may be stale
+    live_tasks = snapshot_tasks()
+    live_ids = {task["task_id"] for task in live_tasks}
+    tasks = live_tasks
+    if status:
+        tasks = [task for task in tasks if task["status"] == status]
+    stored = await asyncio.to_thread(query_tasks, status, limit + len(live_ids))
+    tasks.extend(task for task in stored if task["task_id"] not in live_ids)
+    tasks.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+    tasks = tasks[:limit]
+    if not full:
+        tasks = [{field: task.get(field) for field in TASK_SUMMARY_FIELDS} for task in tasks]
+
+    processing_count = sum(1 for task in live_tasks if task["status"] == "processing")
+
+    return {
+        "tasks": tasks,
+        "total": len(tasks),
+        "processing": processing_count,
+        "max_concurrent": max_concurrent_tasks,
+        "available_gpus": len(available_gpus)
+    }
+
+def parse_byte_range(range_header: str, size: int) -> Optional[tuple]:
+    """Parse a single-range ``Range`` header into inclusive ``(start, end)``.
+
+    Returns None for headers this server does not handle (other units or
+    several ranges) and, as RFC 9110 requires, for malformed ranges such as
+    ``bytes=5-3``; those are answered with the whole file. Raises 416 only
+    for a valid range that starts past the end of the file.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not (first or last) or not all(part.isascii() and part.isdigit() for part in (first, last) if part):
+        return None
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0) if int(last) else size
+        end = size - 1
+    if start >= size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def read_file_range(file_path: str, start: int, end: int, chunk_size: int = 1 << 20):
+    """Yield bytes ``start``..``end`` (inclusive) of a file; Starlette runs it in a thread."""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
 @app.get("/download/{filename}")
-async def download_file(filename: str):
-    """Download generated audio file."""
-    file_path = os.path.join("api_outputs", filename)
+async def download_file(filename: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """Download generated audio file.
+
+    A ``Range: bytes=N-`` header returns 206 with the rest of the file, so an
+    interrupted download can resume where it stopped.
+    """
+    file_path = os.path.join(OUTPUT_DIR, filename)
 
-    if not os.path.exists(file_path):
+    try:
+        st = await asyncio.to_thread(os.stat, file_path)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
         raise HTTPException(status_code=404, detail="File not found")
+    size = st.st_size
+
+    byte_range = parse_byte_range(range_header, size) if range_header else None
+    if byte_range is not None:
+        start, end = byte_range
+        return StreamingResponse(
+            read_file_range(file_path, start, end),
+            status_code=206,
+            media_type="audio/mpeg",
+            headers={
+                **AUDIO_HEADERS,
+                "Content-Range": f"bytes {start}-{end}/{size}",
+                "Content-Length": str(end - start + 1),
+                "Accept-Ranges": "bytes"
+            }
+        )
 
     return FileResponse(
         file_path,
         media_type="audio/mpeg",
-        filename=filename
+        filename=filename,
+        headers={**AUDIO_HEADERS, "Accept-Ranges": "bytes"}
     )
 
+def model_is_ready(lora_name: Optional[str], gpu_id: int) -> bool:
+    """True if the GPU's resident model already has the requested LoRA applied."""
+    return current_models.get(gpu_id) is not None and lora_name == current_lora_paths.get(gpu_id)
+
+def cleanup_output_files(output_dir: str, cutoff: float) -> int:
+    """Delete files in ``output_dir`` last modified before ``cutoff``; returns the count."""
+    deleted = 0
+    # scandir yields the file type with each entry, so each file costs only one stat
+    with os.scandir(output_dir) as it:
+        for entry in it:
+            try:
+                if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    deleted += 1
+            except OSError:
+                continue
+    return deleted
+
+@app.delete("/cleanup")
+async def cleanup_old_files(max_age_hours: float = 1.0):
+    """Delete generated audio files older than ``max_age_hours``."""
+    try:
+        cutoff = time.time() - max_age_hours * 3600
+        deleted_count = await asyncio.to_thread(cleanup_output_files, OUTPUT_DIR, cutoff)
+        logger.info(f"Cleanup removed {deleted_count} files older than {max_age_hours}h")
+        return {"message": "Cleanup completed", "deleted_count": deleted_count}
+    except FileNotFoundError:
+        return {"message": "Cleanup completed", "deleted_count": 0}
+    except Exception as e:
+        logger.error(f"Error during cleanup: {e}")
+        raise HTTPException(status_code=500, detail=f"Cleanup failed: {str(e)}")
+
 def load_model_with_lora(lora_name: Optional[str] = None, gpu_id: int = 0):
-    """Load model with specified LoRA on specific GPU."""
+    """Load model with specified LoRA on specific GPU.
+
+    The base model stays resident on each GPU; switching between LoRAs with a
+    compatible config only swaps the adapter tensors, which are kept in a
+    per-GPU LRU cache.
+    """
     global current_models, current_lora_paths
 
+    # Common case: the right model is resident, so take the lock only to mutate it
+    if model_is_ready(lora_name, gpu_id):
+        return
+
     with model_locks[gpu_id]:
-        # Check if model already loaded with correct LoRA on this GPU
-        if (gpu_id in current_models and current_models[gpu_id] is not None and
-            lora_name == current_lora_paths.get(gpu_id)):
+        # Re-check under the lock in case another load on this GPU just finished
+        if model_is_ready(lora_name, gpu_id):
             logger.info(f"Model already loaded on GPU {gpu_id} with correct LoRA")
             return
 
-        logger.info(f"Loading VoxCPM model on GPU {gpu_id}...")
-
         try:
-            # Import here to avoid loading during startup
-            from voxcpm.core import VoxCPM
-            from voxcpm.model.voxcpm import LoRAConfig
-            import numpy as np
-            import torch
-            import soundfile as sf
-            from pydub import AudioSegment
-
-            # Set CUDA device before loading
-            if torch.cuda.is_available():
-                torch.cuda.set_device(gpu_id)
-                # Set environment variable for this thread
-                old_cuda_visible = os.environ.get("CUDA_VISIBLE_DEVICES", "")
-                os.environ["CUDA_VISIBLE_DEVICES"] = str(gpu_id)
-
-            # Default model path
-            model_path = str(project_root / "models" / "openbmb__VoxCPM1.5")
-
-            # Load LoRA config if available
-            lora_config = get_default_lora_config()
-            lora_weights_path = None
-
-            if lora_name and lora_name != "None":
-                lora_path = os.path.join("lora", lora_name)
-                if os.path.exists(lora_path):
-                    lora_weights_path = lora_path
-                    loaded_config, _ = load_lora_config_from_checkpoint(lora_path)
-                    if loaded_config:
-                        lora_config = loaded_config
-
-            # Load model - it should automatically use the set CUDA device
-            logger.info(f"Loading model: {model_path} for GPU {gpu_id}")
-            model = VoxCPM.from_pretrained(
-                hf_model_id=model_path,
-                load_denoiser=False,
-                optimize=False,
-                lora_config=lora_config,
-                lora_weights_path=lora_weights_path,
-            )
-
-            # Restore CUDA_VISIBLE_DEVICES
-            if torch.cuda.is_available():
-                os.environ["CUDA_VISIBLE_DEVICES"] = old_cuda_visible
+            # Select the device per call rather than through the process-global
+            # CUDA_VISIBLE_DEVICES, so loads on different GPUs cannot race
+            device_ctx = torch.cuda.device(gpu_id) if torch.cuda.is_available() else contextlib.nullcontext()
+            with device_ctx:
+                # Load LoRA config if available
+                lora_config = get_default_lora_config()
+                lora_weights_path = None
+
+                if lora_name and lora_name != "None":
+                    lora_path = os.path.join("lora", lora_name)
+                    if os.path.exists(lora_path):
+                        lora_weights_path = lora_path
+                        loaded_config, _ = load_lora_config_from_checkpoint(lora_path)
+                        if loaded_config:
+                            lora_config = loaded_config
+
+                # Hot-swap adapter weights when the resident model has a matching LoRA layout
+                model = current_models.get(gpu_id)
+                if model is not None and (lora_weights_path is None or model.tts_model.lora_config == lora_config):
+                    swap_lora_weights(model, lora_name, lora_weights_path, gpu_id)
+                    current_lora_paths[gpu_id] = lora_name
+                    logger.info(f"Switched GPU {gpu_id} to LoRA '{lora_name}' without reloading base model")
+                    return
+
+                logger.info(f"Loading VoxCPM model on GPU {gpu_id}...")
+
+                # Release the previous model before loading a new one
+                current_models[gpu_id] = None
+                model = None
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+
+                model_path = BASE_MODEL_PATH
+
+                # Load model - "cuda" resolves to this GPU inside the device context
+                logger.info(f"Loading model: {model_path} for GPU {gpu_id}")
+                model = VoxCPM.from_pretrained(
+                    hf_model_id=model_path,
+                    load_denoiser=False,
+                    optimize=optimize_model,
+                    lora_config=lora_config,
+                    lora_weights_path=lora_weights_path,
+                    dtype=model_dtype,
+                )
+                if model_quantize == "int8":
+                    quantize_int8_weights(model.tts_model)
 
-            current_models[gpu_id] = model
-            current_lora_paths[gpu_id] = lora_name
-            logger.info(f"Model loaded successfully on GPU {gpu_id}")
+                current_models[gpu_id] = model
+                current_lora_paths[gpu_id] = lora_name
+                logger.info(f"Model loaded successfully on GPU {gpu_id}")
 
         except Exception as e:
             logger.error(f"Error loading model on GPU {gpu_id}: {e}")
@@ -346,10 +1179,279 @@ def load_model_with_lora(lora_name: Optional[str] = None, gpu_id: int = 0):
                 current_lora_paths[gpu_id] = None
             raise
 
+def quantize_int8_weights(tts_model):
+    """Quantize the LM/DiT linear layers to int8 weight-only with torchao.
+
+    LoRA layers and the float32 AudioVAE are left as is, so adapters keep
+    their own dtype and stay hot-swappable.
+    """
+    try:
+        from torchao.quantization import quantize_
+        try:
+            from torchao.quantization import Int8WeightOnlyConfig
+            config = Int8WeightOnlyConfig()
+        except ImportError:
+            from torchao.quantization import int8_weight_only
+            config = int8_weight_only()
+    except ImportError:
+        logger.warning("VOXCPM_QUANTIZE=int8 requires torchao; running unquantized")
+        return
+
+    quantize_(
+        tts_model,
+        config,
+        filter_fn=lambda module, fqn: isinstance(module, torch.nn.Linear) and not fqn.startswith("audio_vae"),
+    )
+    logger.info("Quantized LM/DiT linear weights to int8")
+
+def swap_lora_weights(model, lora_name: Optional[str], lora_path: Optional[str], gpu_id: int):
+    """Swap LoRA adapter weights on a resident model, using the per-GPU LRU cache."""
+    if lora_path is None:
+        model.set_lora_enabled(False)
+        return
+
+    cache = lora_weight_caches.setdefault(gpu_id, OrderedDict())
+    state_dict = cache.get(lora_name)
+    if state_dict is not None:
+        cache.move_to_end(lora_name)
+    else:
+        state_dict = read_lora_to_device(model, lora_path, gpu_id)
+        cache[lora_name] = state_dict
+        evict_lora_weights(gpu_id)
+
+    model.unload_lora()
+    model.load_lora_state_dict(state_dict)
+    model.set_lora_enabled(True)
+
+def read_lora_to_device(model, lora_path: str, gpu_id: int) -> Dict:
+    """Read LoRA tensors on the host and upload them through pinned staging buffers.
+
+    Copies from pageable memory go through a driver bounce buffer, so tensors
+    are staged in page-locked buffers (allocated once per parameter and reused
+    across loads) and uploaded asynchronously on a per-GPU copy stream.
+    """
+    cpu_state_dict = model.tts_model.read_lora_state_dict(lora_path, device="cpu")
+    if not torch.cuda.is_available():
+        return cpu_state_dict
+
+    device = _gpu_device(gpu_id)
+    buffers = pinned_lora_buffers.setdefault(gpu_id, {})
+    stream = lora_copy_streams.get(gpu_id)
+    if stream is None:
+        stream = lora_copy_streams[gpu_id] = torch.cuda.Stream(device=device)
+
+    state_dict = {}
+    with torch.cuda.stream(stream):
+        for key, tensor in cpu_state_dict.items():
+            buf = buffers.get(key)
+            if buf is None or buf.shape != tensor.shape or buf.dtype != tensor.dtype:
+                buf = buffers[key] = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=True)
+            buf.copy_(tensor)
+            state_dict[key] = buf.to(device, non_blocking=True)
+    # Staging buffers are reused by the next load, so wait for the uploads here
+    stream.synchronize()
+    return state_dict
+
+def evict_lora_weights(gpu_id: int):
+    """Evict least recently used LoRA adapters while over capacity or short on GPU memory."""
+    cache = lora_weight_caches.get(gpu_id)
+    while cache and len(cache) > 1 and (
+        len(cache) > max_cached_loras or _gpu_free_memory(gpu_id) < lora_cache_min_free_bytes
+    ):
+        evicted_name, _ = cache.popitem(last=False)
+        logger.info(f"Evicted LoRA '{evicted_name}' from GPU {gpu_id} cache")
+
+def get_prompt_cache(model, gpu_id: int, ref_audio_path: Optional[str], ref_text: Optional[str]):
+    """Return the encoded reference prompt, reusing it while the audio file is unchanged.
+
+    The audio features depend only on the file, so they are cached per
+    (path, mtime) and shared by requests that pair the same voice with
+    different reference texts.
+    """
+    if not ref_audio_path or not ref_text:
+        return None
+
+    key = (ref_audio_path, os.stat(ref_audio_path).st_mtime_ns)
+    cache = prompt_caches.setdefault(gpu_id, OrderedDict())
+    audio_feat = cache.get(key)
+    if audio_feat is not None:
+        cache.move_to_end(key)
+        return {"prompt_text": ref_text, "audio_feat": audio_feat}
+
+    audio_feat = load_speaker_features(model, ref_audio_path, ref_text)
+    cache[key] = audio_feat
+    while len(cache) > max_cached_prompts:
+        cache.popitem(last=False)
+    return {"prompt_text": ref_text, "audio_feat": audio_feat}
+
+def file_blake2b(path: str, prefix: bytes = b"") -> str:
+    """16-byte BLAKE2b of ``prefix`` followed by a file's content, in constant memory."""
+    with open(path, "rb") as f:
+        # file_digest (3.11+) reads into one reusable buffer, bypassing Python-level chunk objects
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, lambda: hashlib.blake2b(prefix, digest_size=16)).hexdigest()
+        digest = hashlib.blake2b(prefix, digest_size=16)
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+        return digest.hexdigest()
+
+def speaker_cache_path(ref_audio_path: str) -> str:
+    """On-disk feature cache in SPEAKER_CACHE_DIR, keyed by the reference audio's content and the model."""
+    digest = file_blake2b(ref_audio_path, prefix=os.path.basename(BASE_MODEL_PATH).encode())
+    return os.path.join(SPEAKER_CACHE_DIR, f"{digest}.spk.pt")
+
+def load_speaker_features(model, ref_audio_path: str, ref_text: str):
+    """Encode reference audio, reusing features persisted by an earlier run when available."""
+    if not speaker_disk_cache:
+        return model.build_prompt_cache(ref_audio_path, ref_text)["audio_feat"]
+
+    cache_path = speaker_cache_path(ref_audio_path)
+    if os.path.exists(cache_path):
+        try:
+            return torch.load(cache_path, map_location="cpu", weights_only=True)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable speaker cache {cache_path}: {e}")
+
+    audio_feat = model.build_prompt_cache(ref_audio_path, ref_text)["audio_feat"]
+    try:
+        # Write to a temporary name first so concurrent readers never see a partial file
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        torch.save(audio_feat, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write speaker cache {cache_path}: {e}")
+    return audio_feat
+
+@functools.lru_cache(maxsize=256)
+def _file_content_digest(path: str, mtime_ns: int, size: int) -> str:
+    """Content hash of a file; the stat fields in the key drop stale entries when it changes."""
+    return file_blake2b(path)
+
+def result_cache_key(request: TTSRequest) -> Optional[str]:
+    """Key identifying the audio a request will produce, or None if it is not cacheable.
+
+    Only requests with a fixed seed are deterministic. The key covers the
+    model settings, the LoRA checkpoint's mtime and the reference audio's
+    content, so replacing either invalidates earlier results.
+    """
+    if result_cache_max_bytes <= 0 or request.seed == -1:
+        return None
+    try:
+        lora_mtime = None
+        if request.lora_name and request.lora_name != "None":
+            lora_mtime = os.stat(os.path.join("lora", request.lora_name)).st_mtime_ns
+        ref_digest = None
+        if request.ref_audio_path:
+            st = os.stat(request.ref_audio_path)
+            ref_digest = _file_content_digest(request.ref_audio_path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None  # Let generation report the missing file
+
+    fields = [os.path.basename(BASE_MODEL_PATH), model_dtype, model_quantize,
+              request.text, request.lora_name, lora_mtime, request.cfg_scale, request.steps,
+              request.seed, ref_digest, request.ref_text]
+    return hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode()).hexdigest()
+
+def link_or_copy(src: str, dst: str):
+    """Hard-link ``src`` to ``dst``, copying when the filesystem does not support links."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def evict_result_cache():
+    """Drop least recently used results until the cache fits its cap."""
+    global result_cache_bytes
+    evicted = []
+    with result_cache_lock:
+        while result_cache_bytes > result_cache_max_bytes and result_cache:
+            key, size = result_cache.popitem(last=False)
+            result_cache_bytes -= size
+            evicted.append(key)
+    # Unlink outside the lock so lookups do not wait on the filesystem
+    for key in evicted:
+        with contextlib.suppress(OSError):
+            os.unlink(os.path.join(RESULT_CACHE_DIR, f"{key}.mp3"))
+
+def schedule_result_cache_eviction():
+    """Run eviction on the I/O threads instead of the GPU thread or encoder finishing a task."""
+    try:
+        io_executor.submit(evict_result_cache)
+    except (AttributeError, RuntimeError):  # Executor not started yet or already shut down
+        evict_result_cache()
+
+def load_result_cache():
+    """Index results cached by earlier runs, least recently used first."""
+    global result_cache_bytes
+    if result_cache_max_bytes <= 0:
+        return
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    entries = []
+    with os.scandir(RESULT_CACHE_DIR) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False) and entry.name.endswith(".mp3"):
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.name[:-4], st.st_size))
+    with result_cache_lock:
+        for _, key, size in sorted(entries):
+            result_cache[key] = size
+            result_cache_bytes += size
+    evict_result_cache()
+    logger.info(f"Result cache: {len(result_cache)} files, {result_cache_bytes / 1024 ** 2:.1f} MB")
+
+def lookup_cached_result(key: str) -> Optional[str]:
+    """Path of the cached MP3 for ``key``, marking it recently used; None on a miss."""
+    global result_cache_bytes
+    path = os.path.join(RESULT_CACHE_DIR, f"{key}.mp3")
+    with result_cache_lock:
+        if key not in result_cache:
+            return None
+        if not os.path.isfile(path):
+            result_cache_bytes -= result_cache.pop(key)
+            return None
+        result_cache.move_to_end(key)
+    # Keep the file mtimes in LRU order so a restart resumes the same eviction order
+    with contextlib.suppress(OSError):
+        os.utime(path)
+    return path
+
+def store_cached_result(key: str, audio_path: str):
+    """Add a finished task's MP3 to the result cache."""
+    global result_cache_bytes
+    path = os.path.join(RESULT_CACHE_DIR, f"{key}.mp3")
+    try:
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        link_or_copy(audio_path, tmp_path)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+    except OSError as e:
+        logger.warning(f"Could not cache result {audio_path}: {e}")
+        return
+    with result_cache_lock:
+        result_cache_bytes += size - result_cache.pop(key, 0)
+        result_cache[key] = size
+        over_cap = result_cache_bytes > result_cache_max_bytes
+    if over_cap:
+        schedule_result_cache_eviction()
+
+def get_compute_stream(gpu_id: int):
+    """Return the dedicated CUDA stream used for generation on a GPU."""
+    stream = compute_streams.get(gpu_id)
+    if stream is None:
+        stream = compute_streams[gpu_id] = torch.cuda.Stream(device=_gpu_device(gpu_id))
+    return stream
+
+def _gpu_device(gpu_id: int) -> str:
+    return f"cuda:{gpu_id}" if torch.cuda.is_available() else "cpu"
+
+def _gpu_free_memory(gpu_id: int) -> float:
+    if not torch.cuda.is_available():
+        return float("inf")
+    return torch.cuda.mem_get_info(gpu_id)[0]
+
 def get_default_lora_config():
     """Return default LoRA config."""
     try:
-        from voxcpm.model.voxcpm import LoRAConfig
         return LoRAConfig(
             enable_lm=True,
             enable_dit=True,
@@ -363,94 +1465,206 @@ def get_default_lora_config():
 
 def load_lora_config_from_checkpoint(lora_path):
     """Load LoRA config from checkpoint."""
+    lora_config_file = os.path.join(lora_path, "lora_config.json")
+    try:
+        mtime_ns = os.stat(lora_config_file).st_mtime_ns
+    except OSError:
+        return None, None
+    return _read_lora_config(lora_config_file, mtime_ns)
+
+@functools.lru_cache(maxsize=64)
+def _read_lora_config(lora_config_file: str, mtime_ns: int):
+    """Parse a lora_config.json; keyed by mtime so edited files are re-read."""
     try:
-        lora_config_file = os.path.join(lora_path, "lora_config.json")
-        if os.path.exists(lora_config_file):
-            with open(lora_config_file, "r", encoding="utf-8") as f:
-                lora_info = json.load(f)
-            lora_cfg_dict = lora_info.get("lora_config", {})
-            if lora_cfg_dict:
-                from voxcpm.model.voxcpm import LoRAConfig
-                return LoRAConfig(**lora_cfg_dict), lora_info.get("base_model")
+        with open(lora_config_file, "r", encoding="utf-8") as f:
+            lora_info = json.load(f)
+        lora_cfg_dict = lora_info.get("lora_config", {})
+        if lora_cfg_dict:
+            return LoRAConfig(**lora_cfg_dict), lora_info.get("base_model")
     except Exception:
         pass
     return None, None
 
+def new_mp3_encoder(sample_rate: int):
+    """Create a mono 128 kbps lameenc encoder."""
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(128)
+    encoder.set_in_sample_rate(sample_rate)
+    encoder.set_channels(1)
+    encoder.set_quality(5)  # LAME's default; q2 is roughly twice as slow for little audible gain
+    return encoder
+
+def to_pcm16(audio_data):
+    """Quantize a float waveform in [-1, 1] to int16 PCM.
+
+    Works in per-thread scratch buffers that are reused across calls, so the
+    returned array is only valid until the same thread converts again.
+    """
+    n = len(audio_data)
+    buffers = getattr(pcm_scratch, "buffers", None)
+    if buffers is None or buffers[1].size < n:
+        buffers = pcm_scratch.buffers = (np.empty(n, dtype=np.float32), np.empty(n, dtype=np.int16))
+    clipped, pcm = buffers[0][:n], buffers[1][:n]
+    np.clip(audio_data, -1.0, 1.0, out=clipped)
+    np.multiply(clipped, 32767, out=pcm, casting="unsafe")
+    return pcm
+
 def convert_to_mp3(audio_data, sample_rate, output_path):
-    """Convert numpy audio data to MP3 format."""
+    """Convert numpy audio data to MP3 format. Returns True on success."""
     try:
-        import soundfile as sf
-        from pydub import AudioSegment
+        if lameenc is None:
+            raise RuntimeError("lameenc is not installed")
 
-        # Save as WAV first
-        temp_wav_path = output_path.replace('.mp3', '_temp.wav')
-        sf.write(temp_wav_path, audio_data, sample_rate)
+        # Encode in memory: float waveform -> int16 PCM -> MP3
+        encoder = new_mp3_encoder(sample_rate)
+        mp3_data = encoder.encode(to_pcm16(audio_data).tobytes()) + encoder.flush()
 
-        # Convert to MP3
-        audio = AudioSegment.from_wav(temp_wav_path)
-        audio.export(output_path, format="mp3", bitrate="128k")
-
-        # Clean up temp file
-        os.remove(temp_wav_path)
+        with open(output_path, 'wb') as f:
+            f.write(mp3_data)
+        return True
     except Exception as e:
         logger.error(f"Error converting to MP3: {e}")
+        return False
+
+def make_output_path(task_id: str) -> str:
+    """Return the MP3 output path for a task; the output directory is created at startup."""
+    filename = f"tts_{task_id}_{next(output_counter):06d}.mp3"
+    return os.path.join(OUTPUT_DIR, filename)
+
+@contextlib.contextmanager
+def generation_context(gpu_id: int):
+    """Run generation under inference mode on the GPU's device and compute stream.
+
+    Tasks for one GPU are serialized by its single-thread executor, so no lock
+    is needed around generation itself. Each task is its own forward pass: the
+    LM decoders keep batch-size-1 KV caches and a single stop decision.
+    """
+    if not torch.cuda.is_available():
+        with torch.inference_mode():
+            yield
+        return
+
+    stream = get_compute_stream(gpu_id)
+    # Model loads and LoRA swaps are queued on the default stream; order generation after them
+    stream.wait_stream(torch.cuda.current_stream(gpu_id))
+    with torch.inference_mode(), torch.cuda.device(gpu_id), torch.cuda.stream(stream):
+        yield
+    stream.synchronize()
+
+def prepare_generation(task_id: str, request_data: Dict, gpu_id: int):
+    """Load the requested model and build the ``generate`` arguments for a task.
+
+    ``prompt_cache`` is filled in by the caller inside ``generation_context``
+    so the reference prompt is encoded on the task's GPU.
+    """
+    update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.0,
+                         message=f"开始在GPU {gpu_id}处理任务...")
+
+    # Load model with specified LoRA on this GPU
+    update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.1, message="加载模型...")
+    lora_name = request_data.get('lora_name')
+    load_model_with_lora(lora_name, gpu_id)
+
+    if gpu_id not in current_models or current_models[gpu_id] is None:
+        raise Exception(f"Failed to load model on GPU {gpu_id}")
+
+    model = current_models[gpu_id]
+
+    update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.2, message="准备生成参数...")
+
+    # Set seed if provided
+    seed = request_data.get('seed', -1)
+    if seed != -1:
+        torch.manual_seed(seed)
+        np.random.seed(seed)
+
+    # Handle reference audio
+    ref_audio_path = request_data.get('ref_audio_path')
+    ref_text = request_data.get('ref_text')
+
+    generate_kwargs = dict(
+        text=request_data['text'],
+        prompt_wav_path=ref_audio_path,
+        prompt_text=ref_text,
+        cfg_value=request_data.get('cfg_scale', 2.0),
+        inference_timesteps=request_data.get('steps', 10),
+        denoise=False
+    )
+    return model, generate_kwargs
 
-def process_task_real(task_id: str, request_data: Dict, worker_id: int = 0, gpu_id: int = 0):
-    """Process task with real model on specific GPU."""
-    try:
-        update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.0,
-                             message=f"开始在GPU {gpu_id}处理任务...")
+def warmup_gpu(gpu_id: int, lora_name: Optional[str] = None, prefetch_loras: bool = False) -> bool:
+    """Load a model on a GPU and run a tiny generation to initialize CUDA and kernels.
 
-        # Load model with specified LoRA on this GPU
-        update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.1, message="加载模型...")
-        lora_name = request_data.get('lora_name')
+    With ``prefetch_loras`` the LoRA adapters are uploaded into the GPU's
+    cache afterwards, so first requests for them skip the disk read.
+    Returns False if warmup failed.
+    """
+    try:
+        started = time.monotonic()
         load_model_with_lora(lora_name, gpu_id)
+        with generation_context(gpu_id):
+            current_models[gpu_id].generate(text="预热", inference_timesteps=2, max_len=16,
+                                            retry_badcase=False)
+        logger.info(f"GPU {gpu_id} warmed up with LoRA '{lora_name}' in {time.monotonic() - started:.1f}s")
+        if prefetch_loras:
+            prefetch_lora_weights(gpu_id)
+        return True
+    except Exception:
+        logger.exception(f"Warmup failed on GPU {gpu_id}")
+        return False
+
+def prefetch_lora_weights(gpu_id: int):
+    """Upload LoRA adapters that hot-swap onto the resident model into the GPU's LRU cache.
+
+    At most ``max_cached_loras`` are loaded, and the cache's free-memory
+    eviction still applies. LoRAs whose config differs from the resident
+    model's would need a full reload, so they are left to load on demand.
+    """
+    model = current_models[gpu_id]
+    cache = lora_weight_caches.setdefault(gpu_id, OrderedDict())
+    for lora_name in scan_lora_checkpoints()[:max_cached_loras]:
+        if lora_name in cache:
+            continue
+        lora_path = os.path.join("lora", lora_name)
+        loaded_config, _ = load_lora_config_from_checkpoint(lora_path)
+        if loaded_config and model.tts_model.lora_config != loaded_config:
+            continue
+        cache[lora_name] = read_lora_to_device(model, lora_path, gpu_id)
+        evict_lora_weights(gpu_id)
+    logger.info(f"GPU {gpu_id} has {len(cache)} LoRA adapters resident")
 
-        if gpu_id not in current_models or current_models[gpu_id] is None:
-            raise Exception(f"Failed to load model on GPU {gpu_id}")
-
-        model = current_models[gpu_id]
-
-        update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.2, message="准备生成参数...")
-
-        # Set seed if provided
-        seed = request_data.get('seed', -1)
-        if seed != -1:
-            import torch
-            import numpy as np
-            torch.manual_seed(seed)
-            np.random.seed(seed)
+def process_task_real(task_id: str, request_data: Dict, worker_id: int = 0, gpu_id: int = 0,
+                      defer_encoding: bool = False):
+    """Process task with real model on specific GPU.
 
-        # Handle reference audio
-        ref_audio_path = request_data.get('ref_audio_path')
-        ref_text = request_data.get('ref_text')
+    With ``defer_encoding`` the generated audio is queued for the encoder
+    workers, which mark the task completed once the MP3 is written.
+    """
+    try:
+        model, generate_kwargs = prepare_generation(task_id, request_data, gpu_id)
 
         update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.3, message="生成音频中...")
 
-        # Generate audio on specific GPU with lock
-        with model_locks[gpu_id]:
-            audio_np = model.generate(
-                text=request_data['text'],
-                prompt_wav_path=ref_audio_path,
-                prompt_text=ref_text,
-                cfg_value=request_data.get('cfg_scale', 2.0),
-                inference_timesteps=request_data.get('steps', 10),
-                denoise=False
-            )
+        # Generate audio on specific GPU
+        with generation_context(gpu_id):
+            generate_kwargs["prompt_cache"] = get_prompt_cache(
+                model, gpu_id, generate_kwargs["prompt_wav_path"], generate_kwargs["prompt_text"])
+            audio_np = model.generate(**generate_kwargs)
 
         update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.8, message="保存音频文件...")
 
-        # Create output directory
-        output_dir = "api_outputs"
-        os.makedirs(output_dir, exist_ok=True)
+        output_path = make_output_path(task_id)
 
-        # Generate filename
-        timestamp = int(time.time())
-        filename = f"tts_{task_id}_{timestamp}.mp3"
-        output_path = os.path.join(output_dir, filename)
+        if defer_encoding and main_loop is not None:
+            # Hand MP3 encoding to the encoder workers so this GPU can start the next task
+            asyncio.run_coroutine_threadsafe(
+                post_queue.put((audio_np, model.tts_model.sample_rate, output_path, task_id, gpu_id)), main_loop
+            )
+            return {"status": TaskStatus.PROCESSING, "audio_path": output_path, "message": "音频编码中"}
 
         # Convert to MP3
-        convert_to_mp3(audio_np, model.tts_model.sample_rate, output_path)
+        if not convert_to_mp3(audio_np, model.tts_model.sample_rate, output_path):
+            raise Exception("MP3 encoding failed")
 
         update_task_status_safe(task_id, TaskStatus.COMPLETED, progress=1.0,
                              message=f"语音合成完成 (GPU {gpu_id})", audio_path=output_path)
@@ -464,49 +1678,244 @@ def process_task_real(task_id: str, request_data: Dict, worker_id: int = 0, gpu_
         logger.error(f"Task {task_id} failed: {e}")
         return {"status": "failed", "error": str(e)}
 
+def stream_task_real(task_id: str, request_data: Dict, gpu_id: int, emit):
+    """Generate a task chunk by chunk, passing MP3 bytes to ``emit`` as they are encoded.
+
+    The MP3 is also written to disk so the task can still be downloaded.
+    A failure is passed to ``emit`` as the exception, and ``emit(None)`` is
+    always called last to signal the end of the stream.
+    """
+    try:
+        model, generate_kwargs = prepare_generation(task_id, request_data, gpu_id)
+
+        update_task_status_safe(task_id, TaskStatus.PROCESSING, progress=0.3, message="流式生成音频中...")
+
+        output_path = make_output_path(task_id)
+        encoder = new_mp3_encoder(model.tts_model.sample_rate)
+
+        with open(output_path, 'wb') as f, generation_context(gpu_id):
+            generate_kwargs["prompt_cache"] = get_prompt_cache(
+                model, gpu_id, generate_kwargs["prompt_wav_path"], generate_kwargs["prompt_text"])
+            for chunk in model.generate_streaming(**generate_kwargs):
+                mp3_data = encoder.encode(to_pcm16(chunk).tobytes())
+                if mp3_data:
+                    f.write(mp3_data)
+                    emit(bytes(mp3_data))
+            mp3_data = encoder.flush()
+            if mp3_data:
+                f.write(mp3_data)
+                emit(bytes(mp3_data))
+
+        update_task_status_safe(task_id, TaskStatus.COMPLETED, progress=1.0,
+                             message=f"语音合成完成 (GPU {gpu_id})", audio_path=output_path)
+        logger.info(f"Task {task_id} streamed successfully on GPU {gpu_id}")
+
+    except Exception as e:
+        error_msg = f"Task failed: {str(e)}"
+        update_task_status_safe(task_id, TaskStatus.FAILED, message=error_msg, error=str(e))
+        logger.error(f"Task {task_id} failed: {e}")
+        emit(e)
+    finally:
+        emit(None)
+
+async def stream_synthesis(task_id: str, request_data: Dict, gpu_id: int):
+    """Async generator yielding MP3 chunks produced by ``stream_task_real`` on the GPU's executor.
+
+    Re-raises the task's exception if generation fails.
+    """
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    def emit(data):
+        loop.call_soon_threadsafe(chunks.put_nowait, data)
+
+    def release(_):
+        active_streams[gpu_id] -= 1
+
+    # Counted from submission until the executor finishes, so admission sees the stream
+    # even while it waits behind queued tasks on the GPU's thread
+    active_streams[gpu_id] = active_streams.get(gpu_id, 0) + 1
+    future = loop.run_in_executor(gpu_executors.get(gpu_id), stream_task_real, task_id, request_data, gpu_id, emit)
+    future.add_done_callback(release)
+    while True:
+        data = await chunks.get()
+        if data is None:
+            break
+        if isinstance(data, Exception):
+            await future
+            raise data
+        yield data
+    await future
+
 def update_task_status_safe(task_id: str, status: str, progress: float = None,
                            message: str = None, audio_path: str = None,
                            error: str = None):
     """Update task status safely."""
     try:
-        with task_lock:
-            if task_id in task_status:
-                task_status[task_id]['status'] = status
-                task_status[task_id]['updated_at'] = datetime.now().isoformat()
-
-                if progress is not None:
-                    task_status[task_id]['progress'] = progress
-                if message:
-                    task_status[task_id]['message'] = message
-                if audio_path:
-                    task_status[task_id]['audio_path'] = audio_path
-                if error:
-                    task_status[task_id]['error'] = error
+        shard = _shard_index(task_id)
+        with task_shard_locks[shard]:
+            task = task_shards[shard].get(task_id)
+            if task is None:
+                return
+            task.status = status
+            task.updated_at = time.time()
+
+            if progress is not None:
+                task.progress = progress
+            if message:
+                task.message = message
+            if audio_path:
+                task.audio_path = audio_path
+            if error:
+                task.error = error
+            finished = status in (TaskStatus.COMPLETED, TaskStatus.FAILED)
+            watched = task_id in task_watchers or bool(task_feed_watchers)
+            snapshot = task.to_dict() if finished or watched else None
+
+        # Progress updates stay in memory; finished tasks move to the database
+        if finished:
+            save_task(snapshot)
+            with task_shard_locks[shard]:
+                task_shards[shard].pop(task_id, None)
+            cache_key = pending_cache_keys.pop(task_id, None)
+            if cache_key and status == TaskStatus.COMPLETED and snapshot["audio_path"]:
+                store_cached_result(cache_key, snapshot["audio_path"])
+        if watched:
+            publish_task_update(snapshot)
     except Exception as e:
         logger.error(f"Error updating task status: {e}")
 
-def task_worker(worker_id: int, gpu_id: int):
+def watch_task(task_id: str) -> asyncio.Queue:
+    """Subscribe to status snapshots of a task; call from the event loop."""
+    watcher = asyncio.Queue()
+    task_watchers.setdefault(task_id, []).append(watcher)
+    return watcher
+
+def unwatch_task(task_id: str, watcher: asyncio.Queue):
+    watchers = task_watchers.get(task_id)
+    if watchers is not None:
+        watchers.remove(watcher)
+        if not watchers:
+            del task_watchers[task_id]
+
+def publish_task_update(task: Dict):
+    """Deliver a status snapshot to the task's watchers; safe to call from any thread."""
+    if main_loop is not None:
+        main_loop.call_soon_threadsafe(_deliver_task_update, task)
+
+def _deliver_task_update(task: Dict):
+    for watcher in task_watchers.get(task["task_id"], ()):
+        watcher.put_nowait(task)
+    for watcher in task_feed_watchers:
+        watcher.put_nowait(task)
+
+async def stop_workers(tasks: List[asyncio.Task], timeout: float = 5.0):
+    """Wait for workers to exit on their own, cancelling any still running after ``timeout``."""
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    tasks.clear()
+
+async def task_worker(worker_id: int, gpu_id: int):
     """Background worker to process tasks from queue on specific GPU."""
     logger.info(f"Task worker {worker_id} started for GPU {gpu_id}")
 
+    loop = asyncio.get_running_loop()
+    queue = gpu_queues[gpu_id]
+    executor = gpu_executors[gpu_id]
+
+    # Take one task at a time so queued tasks stay visible to admission control and keep FIFO order.
+    # Draining several into a batch gains nothing: generate has no batched path (see generation_context)
     while True:
+        item = await queue.get()
+        if item is SHUTDOWN:
+            queue.task_done()
+            logger.info(f"Task worker {worker_id} for GPU {gpu_id} stopped")
+            return
+        task_id, request_data = item
         try:
-            task_id, request_data = task_queue.get(timeout=2.0)
-            if task_id:
-                logger.info(f"Worker {worker_id} (GPU {gpu_id}) processing task {task_id}")
-                process_task_real(task_id, request_data, worker_id, gpu_id)
+            logger.info(f"Worker {worker_id} (GPU {gpu_id}) processing task {task_id}")
+            started = time.monotonic()
+            await loop.run_in_executor(executor, process_task_real, task_id, request_data, worker_id, gpu_id, True)
+            record_task_duration(time.monotonic() - started)
         except Exception:
-            continue
+            logger.exception(f"Worker {worker_id} (GPU {gpu_id}) error on task {task_id}")
+        finally:
+            queue.task_done()
+
+def record_task_duration(seconds: float):
+    """Fold one task's GPU time into the moving average used for ETAs."""
+    global avg_task_seconds
+    recent_task_seconds.append(seconds)
+    if avg_task_seconds is None:
+        avg_task_seconds = seconds
+    else:
+        avg_task_seconds = 0.8 * avg_task_seconds + 0.2 * seconds
+
+def p95_task_seconds() -> Optional[float]:
+    """95th percentile of recent task durations, or None without enough history."""
+    if len(recent_task_seconds) < 2:
+        return None
+    return statistics.quantiles(recent_task_seconds, n=20)[-1]
+
+async def purge_expired_tasks(interval: float = 60.0):
+    """Periodically drop finished task records older than the TTL."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            purged = await asyncio.to_thread(purge_finished_tasks, task_ttl_s)
+            if purged:
+                logger.info(f"Purged {purged} finished tasks older than {task_ttl_s:.0f}s")
+        except Exception:
+            logger.exception("Error purging finished tasks")
+
+def finish_encoding(audio_np, sample_rate: int, output_path: str, task_id: str, gpu_id: int):
+    """Encode generated audio to MP3 and record the task's outcome.
+
+    Runs on the encoder threads: finishing a task writes its database row
+    and may fill the result cache, which must not block the event loop.
+    """
+    if convert_to_mp3(audio_np, sample_rate, output_path):
+        update_task_status_safe(task_id, TaskStatus.COMPLETED, progress=1.0,
+                             message=f"语音合成完成 (GPU {gpu_id})", audio_path=output_path)
+        logger.info(f"Task {task_id} completed successfully on GPU {gpu_id}")
+    else:
+        update_task_status_safe(task_id, TaskStatus.FAILED, message="Task failed: MP3 encoding failed",
+                             error="MP3 encoding failed")
+
+async def encoder_worker(worker_id: int):
+    """Background worker that encodes generated audio to MP3 off the GPU threads."""
+    logger.info(f"Encoder worker {worker_id} started")
+
+    loop = asyncio.get_running_loop()
+
+    while True:
+        item = await post_queue.get()
+        if item is SHUTDOWN:
+            post_queue.task_done()
+            logger.info(f"Encoder worker {worker_id} stopped")
+            return
+        task_id = item[3]
+        try:
+            await loop.run_in_executor(io_executor, finish_encoding, *item)
+        except Exception:
+            logger.exception(f"Encoder worker {worker_id} error on task {task_id}")
+        finally:
+            post_queue.task_done()
 
 if __name__ == "__main__":
     # Ensure output directory exists
-    os.makedirs("api_outputs", exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # Run the API server
+    # Prefer uvloop/httptools, falling back to the default implementations as start_api.py does
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=8000,
         reload=False,
-        log_level="info"
+        log_level="info",
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto"
     )
\ No newline at end of file
@@ -28,12 +28,13 @@ class VoxCPMDemo:
         asr_device = "cpu" if self.device == "cuda" and "rocm" in torch.__version__.lower() else ("cuda:0" if self.device == "cuda" else "cpu")
         if asr_device == "cpu":
             print("Forcing ASR model to CPU due to ROCm compatibility")
-        self.asr_model: Optional[AutoModel] = AutoModel(
-            model=self.asr_model_id,
-            disable_update=True,
-            log_level='DEBUG',
-            device=asr_device,
-        )
+        with rocm_patch.rocm_safe():
+            self.asr_model: Optional[AutoModel] = AutoModel(
+                model=self.asr_model_id,
+                disable_update=True,
+                log_level='DEBUG',
+                device=asr_device,
+            )
 
         # TTS model (lazy init)
         self.voxcpm_model: Optional[voxcpm.VoxCPM] = None
@@ -71,7 +72,9 @@ class VoxCPMDemo:
         print("Model not loaded, initializing...")
         model_dir = self._resolve_model_dir()
         print(f"Using model dir: {model_dir}")
-        self.voxcpm_model = voxcpm.VoxCPM(voxcpm_model_path=model_dir)
+        # Construction also loads the denoiser and runs a warmup generate
+        with rocm_patch.rocm_safe():
+            self.voxcpm_model = voxcpm.VoxCPM(voxcpm_model_path=model_dir)
         print("Model loaded successfully.")
         return self.voxcpm_model
 
@@ -79,7 +82,8 @@ class VoxCPMDemo:
     def prompt_wav_recognition(self, prompt_wav: Optional[str]) -> str:
         if prompt_wav is None:
             return ""
-        res = self.asr_model.generate(input=prompt_wav, language="auto", use_itn=True)
+        with rocm_patch.rocm_safe():
+            res = self.asr_model.generate(input=prompt_wav, language="auto", use_itn=True)
         text = res[0]["text"].split('|>')[-1]
         return text
 
@@ -107,15 +111,16 @@ class VoxCPMDemo:
         prompt_text = prompt_text_input if prompt_text_input else None
 
         print(f"Generating audio for text: '{text[:60]}...'")
-        wav = current_model.generate(
-            text=text,
-            prompt_text=prompt_text,
-            prompt_wav_path=prompt_wav_path,
-            cfg_value=float(cfg_value_input),
-            inference_timesteps=int(inference_timesteps_input),
-            normalize=do_normalize,
-            denoise=denoise,
-        )
+        with rocm_patch.rocm_safe():
+            wav = current_model.generate(
+                text=text,
+                prompt_text=prompt_text,
+                prompt_wav_path=prompt_wav_path,
+                cfg_value=float(cfg_value_input),
+                inference_timesteps=int(inference_timesteps_input),
+                normalize=do_normalize,
+                denoise=denoise,
+            )
         return (current_model.tts_model.sample_rate, wav)
 
 
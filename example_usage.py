@@ -6,17 +6,41 @@ with different LoRA models.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
 import json
+import os
+import shutil
 import time
 
+try:
+    import orjson  # parses response bytes directly, faster than response.json()
+except ImportError:
+    orjson = None
+
 # API base URL - 根据实际情况修改
 BASE_URL = "http://localhost:8000"  # 本地访问
 # BASE_URL = "http://192.168.1.100:8000"  # 局域网访问 (请替换为实际IP)
 
+# Shared session: keep-alive reuses one TCP connection across calls
+# (urllib3 already sets TCP_NODELAY on every connection, so small requests are not delayed by Nagle)
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                       max_retries=Retry(total=5, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+                                         allowed_methods=["GET"]))
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
+
+def parse_json(response):
+    """Decode a JSON response body, with orjson when it is installed."""
+    return orjson.loads(response.content) if orjson else response.json()
+
 def test_api_connection():
     """Test if the API is running."""
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = SESSION.get(f"{BASE_URL}/health")
         if response.status_code == 200:
             print("✅ API is running and healthy")
             return True
@@ -30,9 +54,9 @@ def test_api_connection():
 def list_available_loras():
     """List all available LoRA models."""
     try:
-        response = requests.get(f"{BASE_URL}/loras")
+        response = SESSION.get(f"{BASE_URL}/loras")
         if response.status_code == 200:
-            data = response.json()
+            data = parse_json(response)
             loras = data.get("loras", [])
             print(f"\n📋 Available LoRA models ({len(loras)}):")
             for i, lora in enumerate(loras, 1):
@@ -45,8 +69,18 @@ def list_available_loras():
         print(f"❌ Error listing LoRAs: {e}")
         return []
 
-def synthesize_speech(text, lora_name=None, **kwargs):
-    """Synthesize speech using the API."""
+def file_digest(path):
+    """BLAKE2b of a file, hashed in constant memory."""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(f, "blake2b").hexdigest()
+        digest = hashlib.blake2b()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+        return digest.hexdigest()
+
+def synthesize_speech(text, save_path, lora_name=None, **kwargs):
+    """Synthesize speech, writing the MP3 to save_path while it is generated."""
     url = f"{BASE_URL}/synthesize"
 
     payload = {
@@ -55,50 +89,172 @@ def synthesize_speech(text, lora_name=None, **kwargs):
         **kwargs
     }
 
+    # Seeded requests are cached by the server; resend the ETag it gave us last
+    # time so an unchanged result comes back as a bodyless 304
+    request_hash = hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=16).hexdigest()
+    etag_path = f"{save_path}.etag"
+    headers = {}
+    if os.path.exists(save_path) and os.path.exists(etag_path):
+        with open(etag_path) as f:
+            cached = json.load(f)
+        # Only claim to have the result if the local file is still the one we saved
+        if cached.get("request") == request_hash and cached.get("digest") == file_digest(save_path):
+            headers["If-None-Match"] = cached["etag"]
+
     print(f"\n🎵 Synthesizing speech...")
     print(f"   Text: {text[:50]}{'...' if len(text) > 50 else ''}")
     print(f"   LoRA: {lora_name or 'None'}")
 
+    part_path = f"{save_path}.part"
     try:
-        response = requests.post(url, json=payload)
-
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Synthesis successful!")
-            print(f"   Task ID: {data['task_id']}")
-            print(f"   Audio file: {data['audio_path']}")
-            print(f"   Sample rate: {data['sample_rate']} Hz")
-            return data
-        else:
-            error_detail = response.json().get("detail", "Unknown error")
-            print(f"❌ Synthesis failed: {error_detail}")
-            return None
+        # The server streams audio/mpeg as it is generated; no separate download needed
+        with SESSION.post(url, json=payload, params={"stream": 1}, headers=headers, stream=True) as response:
+            if response.status_code == 304:
+                print(f"✅ Audio unchanged, keeping: {save_path}")
+                return save_path
+            if response.status_code == 200:
+                received = 0
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(65536):
+                        f.write(chunk)
+                        received += len(chunk)
+                # A 200 is sent before generation finishes, so confirm the task itself succeeded
+                task_id = response.headers.get("X-Task-Id")
+                task = parse_json(SESSION.get(f"{BASE_URL}/task/{task_id}")) if task_id else {}
+                if received == 0 or task.get("status") != "completed":
+                    print(f"❌ Synthesis failed: {task.get('error') or 'no audio received'}")
+                    return None
+                os.replace(part_path, save_path)
+                etag = response.headers.get("ETag")
+                if etag:
+                    with open(etag_path, 'w') as f:
+                        json.dump({"request": request_hash, "etag": etag,
+                                   "digest": file_digest(save_path)}, f)
+                print(f"✅ Synthesis successful!")
+                print(f"   Task ID: {response.headers.get('X-Task-Id')}")
+                print(f"   Audio saved to: {save_path}")
+                return save_path
+            else:
+                error_detail = parse_json(response).get("detail", "Unknown error")
+                print(f"❌ Synthesis failed: {error_detail}")
+                return None
     except Exception as e:
         print(f"❌ Error during synthesis: {e}")
         return None
+    finally:
+        # Left behind only when the stream failed or was cut off
+        if os.path.exists(part_path):
+            os.remove(part_path)
 
-def download_audio(filename, save_path=None):
-    """Download generated audio file."""
-    url = f"{BASE_URL}/download/{filename}"
+def synthesize_batch(items):
+    """Submit several synthesis requests at once; returns the server's batch response.
 
+    Each item is a synthesize_speech-style payload dict. The response holds
+    a multi_task_id and one task descriptor per item, in order.
+    """
     try:
-        response = requests.get(url)
-
+        response = SESSION.post(f"{BASE_URL}/synthesize/batch", json={"items": items})
         if response.status_code == 200:
-            if save_path is None:
-                save_path = f"downloaded_{filename}"
+            batch = parse_json(response)
+            print(f"✅ Batch submitted: {batch['message']} (ID: {batch['multi_task_id']})")
+            return batch
+        error_detail = parse_json(response).get("detail", "Unknown error")
+        print(f"❌ Batch submission failed: {error_detail}")
+        return None
+    except Exception as e:
+        print(f"❌ Error submitting batch: {e}")
+        return None
+
+def poll_delay(estimated_time, elapsed, progress):
+    """Seconds to wait before the next poll: sparse early in a job, every 0.5 s near its end."""
+    if progress > 0.9:
+        return 0.5
+    remaining = max(0.0, estimated_time - elapsed)
+    return min(max(0.5, remaining * 0.1), 5.0)
 
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
+def wait_for_batch(multi_task_id, max_wait=600):
+    """Poll a batch until every task has finished; returns its task list.
 
+    Polls are conditional: while nothing changes the server answers 304
+    with no body, and the last parsed status is reused.
+    """
+    url = f"{BASE_URL}/batch/{multi_task_id}"
+    start = time.time()
+    batch, etag = None, None
+    while time.time() - start < max_wait:
+        try:
+            response = SESSION.get(url, headers={"If-None-Match": etag} if etag else None)
+            if response.status_code != 304:
+                response.raise_for_status()
+                batch, etag = parse_json(response), response.headers.get("ETag")
+                print(f"   ⏳ Batch {multi_task_id}: {batch['status']} ({batch['progress'] * 100:.0f}%)")
+                if batch["status"] != "processing":
+                    return batch["tasks"]
+        except Exception as e:
+            print(f"❌ Error checking batch: {e}")
+        if batch is None:
+            time.sleep(1.0)
+            continue
+        estimated_time = max((task.get("estimated_time") or 0 for task in batch["tasks"]), default=0)
+        time.sleep(poll_delay(estimated_time, time.time() - start, batch["progress"]))
+    print(f"❌ Batch {multi_task_id} did not finish within {max_wait}s")
+    return []
+
+def synthesize_many(examples):
+    """Synthesize (save_path, payload) pairs, batching them when they share a LoRA.
+
+    Mixed LoRAs fall back to one streamed request each, since switching
+    LoRA serializes the work on the server anyway.
+    """
+    if len(examples) < 2 or len({payload.get("lora_name") for _, payload in examples}) > 1:
+        for save_path, payload in examples:
+            synthesize_speech(save_path=save_path, **payload)
+        return
+
+    batch = synthesize_batch([payload for _, payload in examples])
+    if batch is None:
+        return
+    finished = {task["task_id"]: task for task in wait_for_batch(batch["multi_task_id"])}
+    for (save_path, _), submitted in zip(examples, batch["tasks"]):
+        task = finished.get(submitted["task_id"])
+        if task and task.get("audio_path"):
+            download_audio(os.path.basename(task["audio_path"]), save_path)
+        else:
+            print(f"❌ {save_path}: {(task or submitted).get('error') or submitted.get('detail', 'failed')}")
+
+def download_audio(filename, save_path=None, attempts=3):
+    """Download generated audio file, resuming from where an interrupted attempt stopped."""
+    url = f"{BASE_URL}/download/{filename}"
+    if save_path is None:
+        save_path = f"downloaded_{filename}"
+    # Bytes received so far live in a .part file, so a partial download is never mistaken for a result
+    part_path = f"{save_path}.part"
+
+    for attempt in range(1, attempts + 1):
+        existing = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={existing}-"} if existing else {}
+        try:
+            with SESSION.get(url, headers=headers, stream=True) as response:
+                if response.status_code == 416:
+                    # The previous attempt already received every byte
+                    pass
+                elif response.status_code in (200, 206):
+                    # 200 means the server sent the whole file, so start over
+                    mode = 'ab' if response.status_code == 206 else 'wb'
+                    # Copy straight from the socket in 1 MiB blocks instead of buffering the whole file
+                    response.raw.decode_content = True
+                    with open(part_path, mode) as f:
+                        shutil.copyfileobj(response.raw, f, length=1 << 20)
+                else:
+                    print(f"❌ Failed to download audio: {response.status_code}")
+                    return None
+
+            os.replace(part_path, save_path)
             print(f"✅ Audio downloaded to: {save_path}")
             return save_path
-        else:
-            print(f"❌ Failed to download audio: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"❌ Error downloading audio: {e}")
-        return None
+        except Exception as e:
+            print(f"❌ Error downloading audio (attempt {attempt}/{attempts}): {e}")
+    return None
 
 def main():
     """Main example function."""
@@ -117,15 +273,11 @@ def main():
     print("📝 Example 1: Basic TTS (no LoRA)")
     print("="*40)
 
-    result1 = synthesize_speech(
+    examples = [("example_basic.mp3", dict(
         text="Hello, this is a test of the VoxCPM text-to-speech system without any LoRA model.",
         cfg_scale=2.0,
         steps=10
-    )
-
-    if result1:
-        filename = os.path.basename(result1['audio_path'])
-        download_audio(filename, "example_basic.mp3")
+    ))]
 
     # Example 2: TTS with LoRA (if available)
     if loras:
@@ -136,17 +288,16 @@ def main():
         # Use the first available LoRA
         selected_lora = loras[0]
 
-        result2 = synthesize_speech(
+        examples.append((f"example_lora_{os.path.basename(selected_lora)}.mp3", dict(
             text="This is synthesized using a LoRA fine-tuned model for a specific voice style.",
             lora_name=selected_lora,
             cfg_scale=2.5,
             steps=15,
             seed=42
-        )
+        )))
 
-        if result2:
-            filename = os.path.basename(result2['audio_path'])
-            download_audio(filename, f"example_lora_{selected_lora}.mp3")
+    # Requests sharing a LoRA go to the server in one batch
+    synthesize_many(examples)
 
     # Example 3: Voice cloning (if you have a reference audio)
     print("\n" + "="*40)
@@ -154,8 +305,9 @@ def main():
     print("="*40)
 
     # Uncomment and modify this if you have a reference audio file
-    # result3 = synthesize_speech(
+    # synthesize_speech(
     #     text="This is a voice cloning example using the reference audio.",
+    #     save_path="example_clone.mp3",
     #     ref_audio_path="path/to/reference.wav",
     #     ref_text="This is the reference text for voice cloning.",
     #     cfg_scale=2.0,
@@ -170,5 +322,4 @@ def main():
     print(f"📁 Generated files are saved in the current directory")
 
 if __name__ == "__main__":
-    import os
     main()
\ No newline at end of file
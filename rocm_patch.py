@@ -5,15 +5,40 @@ Fixes various torch operations that have issues on ROCm devices
 
 import torch
 import sys
+import threading
+from contextlib import contextmanager
 
+# Read once from the build metadata; unlike torch.cuda.is_available() this queries no device
+IS_ROCM_BUILD = getattr(torch.version, "hip", None) is not None
 
-def patch_tensor_operations():
+
+def _to_host(tensor):
     """
-    Patch various tensor operations that may fail on ROCm.
+    Copy a GPU tensor into pinned host memory for a CPU fallback.
+    Waits only for the work queued on the tensor's current stream, not the whole device.
+    """
+    host = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=True)
+    host.copy_(tensor, non_blocking=True)
+    done = torch.cuda.Event()
+    done.record(torch.cuda.current_stream(tensor.device))
+    done.synchronize()
+    return host
+
+
+def _to_device(result, device):
     """
-    # Patch nonzero operation
-    original_nonzero = torch.Tensor.nonzero
+    Upload a CPU fallback result from pinned memory without blocking the host.
+    The copy is queued on the current stream, so later kernels on it see the data.
+    """
+    if isinstance(result, torch.Tensor):
+        return result.pin_memory().to(device, non_blocking=True)
+    if isinstance(result, tuple):
+        return tuple(_to_device(t, device) for t in result)
+    return result
+
 
+def _make_patched_nonzero(original_nonzero):
+    """Wrap Tensor.nonzero with a CPU fallback."""
     def patched_nonzero(self, *args, **kwargs):
         try:
             return original_nonzero(self, *args, **kwargs)
@@ -21,19 +46,15 @@ def patch_tensor_operations():
             if "hipErrorInvalidDeviceFunction" in str(e):
                 # CPU fallback for nonzero operation
                 if self.is_cuda:
-                    device = self.device
-                    cpu_tensor = self.cpu()
-                    result = original_nonzero(cpu_tensor, *args, **kwargs)
-                    if hasattr(result, 'to'):
-                        return result.to(device)
-                    return result
+                    result = original_nonzero(_to_host(self), *args, **kwargs)
+                    return _to_device(result, self.device)
             raise
 
-    torch.Tensor.nonzero = patched_nonzero
+    return patched_nonzero
 
-    # Patch eq operation for tensors
-    original_eq = torch.Tensor.__eq__
 
+def _make_patched_eq(original_eq):
+    """Wrap Tensor.__eq__ with a CPU fallback."""
     def patched_eq(self, other):
         try:
             return original_eq(self, other)
@@ -41,58 +62,37 @@ def patch_tensor_operations():
             if "hipErrorInvalidDeviceFunction" in str(e):
                 # CPU fallback for eq operation
                 if self.is_cuda:
-                    device = self.device
-                    cpu_self = self.cpu()
-                    cpu_other = other.cpu() if hasattr(other, 'cpu') and other.is_cuda else other
-                    result = original_eq(cpu_self, cpu_other)
-                    if hasattr(result, 'to'):
-                        return result.to(device)
-                    return result
+                    cpu_other = _to_host(other) if isinstance(other, torch.Tensor) and other.is_cuda else other
+                    result = original_eq(_to_host(self), cpu_other)
+                    return _to_device(result, self.device)
             raise
 
-    torch.Tensor.__eq__ = patched_eq
+    return patched_eq
 
-    print("Applied tensor operations patch for ROCm")
-
-
-def patch_tensor_mask():
-    """
-    Patch tensor masking operations that may fail on ROCm.
-    """
-    original_tensor_mask = torch.Tensor.__getitem__
 
+def _make_masked_getitem(original_tensor_mask):
+    """Wrap Tensor.__getitem__ with a CPU fallback for boolean masks."""
     def masked_tensor_getitem(self, mask):
+        # This wrapper runs on every tensor index in the process; only boolean
+        # masks on GPU tensors can hit the failing kernel, so the rest skip the try
+        if not (isinstance(mask, torch.Tensor) and mask.dtype is torch.bool and self.is_cuda):
+            return original_tensor_mask(self, mask)
         try:
             return original_tensor_mask(self, mask)
         except RuntimeError as e:
             if "hipErrorInvalidDeviceFunction" in str(e):
-                # CPU fallback for masking operations
-                if self.is_cuda and isinstance(mask, torch.Tensor) and mask.dtype == torch.bool:
-                    device = self.device
-                    mask_device = mask.device if mask.is_cuda else None
-
-                    # Move both to CPU
-                    cpu_self = self.cpu()
-                    cpu_mask = mask.cpu() if mask.is_cuda else mask
+                # CPU fallback for masking operations: move both to pinned host memory
+                cpu_mask = _to_host(mask) if mask.is_cuda else mask
 
-                    # Apply mask on CPU
-                    result = cpu_self[cpu_mask]
-
-                    # Move result back to original device
-                    return result.to(device)
+                # Apply mask on CPU, then move the result back to the original device
+                return _to_device(_to_host(self)[cpu_mask], self.device)
             raise
 
-    # Apply the patch
-    torch.Tensor.__getitem__ = masked_tensor_getitem
+    return masked_tensor_getitem
 
 
-def patch_unique_consecutive():
-    """
-    Patch torch.unique_consecutive to handle ROCm compatibility issues.
-    This provides a fallback implementation using CPU when the GPU version fails.
-    """
-    original_unique_consecutive = torch.unique_consecutive
-
+def _make_patched_unique_consecutive(original_unique_consecutive):
+    """Wrap torch.unique_consecutive with a CPU fallback."""
     def patched_unique_consecutive(input, *args, **kwargs):
         try:
             # Try the original implementation first
@@ -102,18 +102,10 @@ def patch_unique_consecutive():
                 # If ROCm error, fallback to CPU implementation
                 if input.is_cuda:
                     # Move to CPU, process, then move back to original device
-                    device = input.device
-                    input_cpu = input.cpu()
-
-                    # Apply unique_consecutive on CPU
-                    result_cpu = original_unique_consecutive(input_cpu, *args, **kwargs)
+                    result_cpu = original_unique_consecutive(_to_host(input), *args, **kwargs)
 
-                    # Move result back to GPU if it's a tensor
-                    if isinstance(result_cpu, torch.Tensor):
-                        return result_cpu.to(device)
-                    elif isinstance(result_cpu, tuple):
-                        # Handle tuple of tensors
-                        return tuple(t.to(device) if isinstance(t, torch.Tensor) else t for t in result_cpu)
+                    # Move result back to GPU, including each tensor of a tuple result
+                    return _to_device(result_cpu, input.device)
 
                 # Re-raise if not ROCm-related or fallback failed
                 raise
@@ -121,18 +113,92 @@ def patch_unique_consecutive():
                 # Re-raise if it's a different error
                 raise
 
-    # Replace the function
-    torch.unique_consecutive = patched_unique_consecutive
+    return patched_unique_consecutive
+
+
+# (owner, attribute, wrapper factory) for every op with a ROCm CPU fallback
+ROCM_PATCHES = [
+    (torch.Tensor, "nonzero", _make_patched_nonzero),
+    (torch.Tensor, "__eq__", _make_patched_eq),
+    (torch.Tensor, "__getitem__", _make_masked_getitem),
+    (torch, "unique_consecutive", _make_patched_unique_consecutive),
+]
+
+
+# Shared by every rocm_safe() block; the patches come off when the last one exits
+_scoped_lock = threading.Lock()
+_scoped_depth = 0
+_scoped_originals = []
+
+
+def _install(owner, name, make_patch):
+    setattr(owner, name, make_patch(getattr(owner, name)))
+
+
+def patch_tensor_operations():
+    """
+    Patch various tensor operations that may fail on ROCm.
+    """
+    _install(torch.Tensor, "nonzero", _make_patched_nonzero)
+    _install(torch.Tensor, "__eq__", _make_patched_eq)
+    print("Applied tensor operations patch for ROCm")
+
+
+def patch_tensor_mask():
+    """
+    Patch tensor masking operations that may fail on ROCm.
+    """
+    _install(torch.Tensor, "__getitem__", _make_masked_getitem)
+
+
+def patch_unique_consecutive():
+    """
+    Patch torch.unique_consecutive to handle ROCm compatibility issues.
+    This provides a fallback implementation using CPU when the GPU version fails.
+    """
+    _install(torch, "unique_consecutive", _make_patched_unique_consecutive)
     print("Applied ROCm compatibility patch for torch.unique_consecutive")
 
 
+@contextmanager
+def rocm_safe():
+    """
+    Install the CPU fallbacks for the duration of a block and restore the original ops after.
+    Wrap only the calls known to fail, so the rest of the process indexes tensors without the
+    extra Python layer. Does nothing off ROCm.
+
+    The patched ops are process-wide, so blocks on different threads share one
+    installation: the first block to enter installs it and the last to exit removes it.
+    """
+    global _scoped_depth
+    if not (IS_ROCM_BUILD and torch.cuda.is_available()):
+        yield
+        return
+
+    with _scoped_lock:
+        if _scoped_depth == 0:
+            _scoped_originals[:] = [(owner, name, getattr(owner, name)) for owner, name, _ in ROCM_PATCHES]
+            for owner, name, make_patch in ROCM_PATCHES:
+                _install(owner, name, make_patch)
+        _scoped_depth += 1
+    try:
+        yield
+    finally:
+        with _scoped_lock:
+            _scoped_depth -= 1
+            if _scoped_depth == 0:
+                for owner, name, original in _scoped_originals:
+                    setattr(owner, name, original)
+                _scoped_originals.clear()
+
+
 def patch_model_inference():
     """
     Patch funasr model inference to use CPU fallback for problematic operations.
     """
     # Force the ASR model to use CPU for certain operations if on ROCm
     import os
-    if torch.cuda.is_available() and "rocm" in torch.__version__.lower():
+    if IS_ROCM_BUILD and torch.cuda.is_available():
         # Set environment variables to help with ROCm compatibility
         os.environ["HIP_VISIBLE_DEVICES"] = "0"
         os.environ["HSA_FORCE_FINE_GRAIN_PCIE"] = "1"
@@ -141,13 +207,21 @@ def patch_model_inference():
         print("Set ROCm optimization environment variables")
 
 
-def apply_patches():
-    """Apply all ROCm compatibility patches"""
-    if torch.cuda.is_available() and "rocm" in torch.__version__.lower():
+def apply_patches(install_global=False):
+    """
+    Prepare the process for ROCm.
+    Op fallbacks are scoped with rocm_safe(); pass install_global=True to install them
+    process-wide instead, for code where failing calls cannot be wrapped individually.
+    """
+    if IS_ROCM_BUILD and torch.cuda.is_available():
         print("Detected ROCm, applying compatibility patches...")
 
         # Apply patches in order
         patch_model_inference()
+        if not install_global:
+            print("ROCm op fallbacks are applied inside rocm_safe() blocks")
+            return
+
         patch_unique_consecutive()
 
         # Patch tensor operations
@@ -20,7 +20,8 @@ import os
 # Apply ROCm compatibility patches for AMD GPUs
 try:
     import rocm_patch
-    rocm_patch.apply_patches()
+    # Training touches the patched ops everywhere, so install them process-wide
+    rocm_patch.apply_patches(install_global=True)
 except ImportError:
     pass  # Skip if rocm_patch is not available
 
@@ -14,6 +14,7 @@ class VoxCPM:
             optimize: bool = True,
             lora_config: Optional[LoRAConfig] = None,
             lora_weights_path: Optional[str] = None,
+            dtype: Optional[str] = None,
         ):
         """Initialize VoxCPM TTS pipeline.
 
@@ -29,6 +30,8 @@ class VoxCPM:
                 provided without lora_config, a default config will be created.
             lora_weights_path: Path to pre-trained LoRA weights (.pth file or directory
                 containing lora_weights.ckpt). If provided, LoRA weights will be loaded.
+            dtype: Override the LM/DiT compute dtype from config.json
+                ("bfloat16", "float16" or "float32"). The AudioVAE always runs in float32.
         """
         print(f"voxcpm_model_path: {voxcpm_model_path}, zipenhancer_model_path: {zipenhancer_model_path}, enable_denoiser: {enable_denoiser}")
         
@@ -41,7 +44,8 @@ class VoxCPM:
             )
             print(f"Auto-created default LoRAConfig for loading weights from: {lora_weights_path}")
         
-        self.tts_model = VoxCPMModel.from_local(voxcpm_model_path, optimize=optimize, lora_config=lora_config)
+        self.tts_model = VoxCPMModel.from_local(voxcpm_model_path, optimize=optimize, lora_config=lora_config,
+                                                dtype=dtype)
         
         # Load LoRA weights if path is provided
         if lora_weights_path is not None:
@@ -147,6 +151,7 @@ class VoxCPM:
             retry_badcase_max_times : int = 3,
             retry_badcase_ratio_threshold : float = 6.0,
             streaming: bool = False,
+            prompt_cache: Optional[dict] = None,
         ) -> Generator[np.ndarray, None, None]:
         """Synthesize speech for the given text and return a single waveform.
 
@@ -170,6 +175,8 @@ class VoxCPM:
             retry_badcase_max_times: Maximum number of times to retry badcase.
             retry_badcase_ratio_threshold: Threshold for audio-to-text ratio.
             streaming: Whether to return a generator of audio chunks.
+            prompt_cache: Prompt cache from ``build_prompt_cache``. If given, it
+                is used instead of encoding ``prompt_wav_path`` again.
         Returns:
             Generator of numpy.ndarray: 1D waveform array (float32) on CPU. 
             Yields audio chunks for each generations step if ``streaming=True``,
@@ -187,44 +194,61 @@ class VoxCPM:
         
         text = text.replace("\n", " ")
         text = re.sub(r'\s+', ' ', text)
-        temp_prompt_wav_path = None
         
-        try:
-            if prompt_wav_path is not None and prompt_text is not None:
-                if denoise and self.denoiser is not None:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                        temp_prompt_wav_path = tmp_file.name
-                    self.denoiser.enhance(prompt_wav_path, output_path=temp_prompt_wav_path)
-                    prompt_wav_path = temp_prompt_wav_path
-                fixed_prompt_cache = self.tts_model.build_prompt_cache(
-                    prompt_wav_path=prompt_wav_path,
-                    prompt_text=prompt_text
-                )
-            else:
-                fixed_prompt_cache = None  # will be built from the first inference
-            
-            if normalize:
-                if self.text_normalizer is None:
-                    from .utils.text_normalize import TextNormalizer
-                    self.text_normalizer = TextNormalizer()
-                text = self.text_normalizer.normalize(text)
-            
-            generate_result = self.tts_model._generate_with_prompt_cache(
-                            target_text=text,
-                            prompt_cache=fixed_prompt_cache,
-                            min_len=min_len,
-                            max_len=max_len,
-                            inference_timesteps=inference_timesteps,
-                            cfg_value=cfg_value,
-                            retry_badcase=retry_badcase,
-                            retry_badcase_max_times=retry_badcase_max_times,
-                            retry_badcase_ratio_threshold=retry_badcase_ratio_threshold,
-                            streaming=streaming,
-                        )
+        if prompt_cache is not None:
+            fixed_prompt_cache = prompt_cache
+        elif prompt_wav_path is not None and prompt_text is not None:
+            fixed_prompt_cache = self.build_prompt_cache(prompt_wav_path, prompt_text, denoise=denoise)
+        else:
+            fixed_prompt_cache = None  # will be built from the first inference
         
-            for wav, _, _ in generate_result:
-                yield wav.squeeze(0).cpu().numpy()
+        if normalize:
+            if self.text_normalizer is None:
+                from .utils.text_normalize import TextNormalizer
+                self.text_normalizer = TextNormalizer()
+            text = self.text_normalizer.normalize(text)
         
+        generate_result = self.tts_model._generate_with_prompt_cache(
+                        target_text=text,
+                        prompt_cache=fixed_prompt_cache,
+                        min_len=min_len,
+                        max_len=max_len,
+                        inference_timesteps=inference_timesteps,
+                        cfg_value=cfg_value,
+                        retry_badcase=retry_badcase,
+                        retry_badcase_max_times=retry_badcase_max_times,
+                        retry_badcase_ratio_threshold=retry_badcase_ratio_threshold,
+                        streaming=streaming,
+                    )
+    
+        for wav, _, _ in generate_result:
+            yield wav.squeeze(0).cpu().numpy()
+
+    def build_prompt_cache(self, prompt_wav_path: str, prompt_text: str, denoise: bool = False) -> dict:
+        """Encode a reference prompt once so it can be reused across ``generate`` calls.
+
+        Args:
+            prompt_wav_path: Path to a reference audio file for prompting.
+            prompt_text: Text content corresponding to the prompt audio.
+            denoise: Whether to denoise the prompt audio if a denoiser is
+                available.
+        Returns:
+            dict: Prompt cache to pass as ``prompt_cache`` to ``generate``.
+        """
+        if not os.path.exists(prompt_wav_path):
+            raise FileNotFoundError(f"prompt_wav_path does not exist: {prompt_wav_path}")
+
+        temp_prompt_wav_path = None
+        try:
+            if denoise and self.denoiser is not None:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
+                    temp_prompt_wav_path = tmp_file.name
+                self.denoiser.enhance(prompt_wav_path, output_path=temp_prompt_wav_path)
+                prompt_wav_path = temp_prompt_wav_path
+            return self.tts_model.build_prompt_cache(
+                prompt_wav_path=prompt_wav_path,
+                prompt_text=prompt_text
+            )
         finally:
             if temp_prompt_wav_path and os.path.exists(temp_prompt_wav_path):
                 try:
@@ -255,6 +279,25 @@ class VoxCPM:
             )
         return self.tts_model.load_lora_weights(lora_weights_path)
 
+    def load_lora_state_dict(self, state_dict: dict) -> tuple:
+        """Load LoRA weights from an in-memory state dict (e.g. a cached adapter).
+        
+        Args:
+            state_dict: LoRA parameters (lora_A, lora_B) keyed by parameter name.
+        
+        Returns:
+            tuple: (loaded_keys, skipped_keys) - lists of loaded and skipped parameter names.
+        
+        Raises:
+            RuntimeError: If model was not initialized with LoRA config.
+        """
+        if self.tts_model.lora_config is None:
+            raise RuntimeError(
+                "Cannot load LoRA weights: model was not initialized with LoRA config. "
+                "Please reinitialize with lora_config or lora_weights_path parameter."
+            )
+        return self.tts_model.load_lora_state_dict(state_dict)
+
     def unload_lora(self):
         """Unload LoRA by resetting all LoRA weights to initial state (effectively disabling LoRA)."""
         self.tts_model.reset_lora_weights()
@@ -506,8 +506,12 @@ class VoxCPMModel(nn.Module):
             padding_size = patch_len - audio.size(1) % patch_len
             audio = torch.nn.functional.pad(audio, (padding_size, 0))
 
-        # extract audio features
-        audio_feat = self.audio_vae.encode(audio.to(self.device), self.sample_rate).cpu()
+        # extract audio features; upload through pinned memory so the copy is a direct DMA
+        if self.device == "cuda":
+            audio = audio.pin_memory().to(self.device, non_blocking=True)
+        else:
+            audio = audio.to(self.device)
+        audio_feat = self.audio_vae.encode(audio, self.sample_rate).cpu()
 
         audio_feat = audio_feat.view(
             self.audio_vae.latent_dim,
@@ -821,11 +825,18 @@ class VoxCPMModel(nn.Module):
             
 
     @classmethod
-    def from_local(cls, path: str, optimize: bool = True, training: bool = False, lora_config: LoRAConfig = None):
+    def from_local(cls, path: str, optimize: bool = True, training: bool = False, lora_config: LoRAConfig = None,
+                   dtype: Optional[str] = None):
         config = VoxCPMConfig.model_validate_json(open(os.path.join(path, "config.json")).read())
+        if dtype is not None:
+            get_dtype(dtype)  # validate before building the model
+            config.dtype = dtype
         tokenizer = LlamaTokenizerFast.from_pretrained(path)
         audio_vae_config = getattr(config, 'audio_vae_config', None)
         audio_vae = AudioVAE(config=audio_vae_config) if audio_vae_config else AudioVAE()
+        # Checkpoints are read on the host and copied into the host-side model;
+        # the model is moved to the device once at the end, so the weights are
+        # never resident in VRAM twice
         vae_state_dict = torch.load(
             os.path.join(path, "audiovae.pth"),
             map_location="cpu",
@@ -897,6 +908,20 @@ class VoxCPMModel(nn.Module):
         Returns:
             tuple: (loaded_keys, skipped_keys)
         """
+        device = device or self.device
+        state_dict = self.read_lora_state_dict(lora_path, device=device)
+        return self.load_lora_state_dict(state_dict, device=device)
+
+    def read_lora_state_dict(self, lora_path: str, device: str = None) -> dict:
+        """
+        Read LoRA tensors from a checkpoint without touching model parameters.
+        
+        Args:
+            lora_path: Checkpoint path (directory or .safetensors/.ckpt file)
+            device: Device to load tensors onto, defaults to model's current device
+        Returns:
+            dict: LoRA state dict (lora_A/lora_B tensors keyed by parameter name)
+        """
         from pathlib import Path
         
         device = device or self.device
@@ -912,14 +937,26 @@ class VoxCPMModel(nn.Module):
         
         # Load from safetensors if available
         if safetensors_file and safetensors_file.exists() and SAFETENSORS_AVAILABLE:
-            state_dict = load_file(str(safetensors_file), device=device)
+            return load_file(str(safetensors_file), device=device)
         elif ckpt_file and ckpt_file.exists():
             ckpt = torch.load(ckpt_file, map_location=device, weights_only=False)
-            state_dict = ckpt.get("state_dict", ckpt)
+            return ckpt.get("state_dict", ckpt)
         else:
             raise FileNotFoundError(
                 f"LoRA checkpoint not found. Expected either {safetensors_file} or {ckpt_file}"
             )
+
+    def load_lora_state_dict(self, state_dict: dict, device: str = None):
+        """
+        Copy LoRA tensors into the existing LoRA parameters in place.
+        
+        Args:
+            state_dict: LoRA state dict, e.g. from read_lora_state_dict()
+            device: Target device, defaults to model's current device
+        Returns:
+            tuple: (loaded_keys, skipped_keys)
+        """
+        device = device or self.device
         
         # Build param mapping (handle torch.compile's _orig_mod prefix)
         model_params = dict(self.named_parameters())
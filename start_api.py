@@ -8,10 +8,116 @@ VoxCPM LoRA TTS API 启动脚本
 import os
 import sys
 import argparse
+import importlib.util
 import uvicorn
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+# 开发模式热重载时不扫描的目录和文件：生成的音频、缓存、模型权重和任务数据库
+RELOAD_EXCLUDE_DIRS = ["api_outputs", "models", "lora"]
+RELOAD_EXCLUDE_PATTERNS = ["*.wav", "*.mp3", "*.spk.pt", "tasks.db*"]
+
+
+@dataclass
+class ApiConfig:
+    """启动配置；命令行参数优先，未指定时读取 VOXCPM_API_* 环境变量"""
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    dev: bool = False
+    log_level: str = "info"
+    limit_concurrency: int = 256
+    ssl_keyfile: Optional[str] = None
+    ssl_certfile: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "ApiConfig":
+        env = os.environ.get
+        return cls(
+            host=env("VOXCPM_API_HOST", cls.host),
+            port=int(env("VOXCPM_API_PORT", cls.port)),
+            workers=int(env("VOXCPM_API_WORKERS", cls.workers)),
+            dev=env("VOXCPM_API_DEV", "0") == "1",
+            log_level=env("VOXCPM_API_LOG_LEVEL", cls.log_level),
+            limit_concurrency=int(env("VOXCPM_API_LIMIT_CONCURRENCY", cls.limit_concurrency)),
+            ssl_keyfile=env("VOXCPM_API_SSL_KEYFILE"),
+            ssl_certfile=env("VOXCPM_API_SSL_CERTFILE"),
+        )
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "ApiConfig":
+        return cls(**{name: getattr(args, name) for name in cls.__dataclass_fields__})
+
+    @property
+    def protocol(self) -> str:
+        return "https" if self.ssl_keyfile and self.ssl_certfile else "http"
+
+    def uvicorn_kwargs(self) -> dict:
+        """转换为 uvicorn.run 的参数"""
+        config = {
+            "app": "api_server:app",
+            "host": self.host,
+            "port": self.port,
+            "log_level": self.log_level,
+            "reload": self.dev,
+            # uvloop 事件循环和 httptools 解析器（C 实现），未安装时回退到默认实现
+            "loop": "uvloop" if importlib.util.find_spec("uvloop") else "auto",
+            "http": "httptools" if importlib.util.find_spec("httptools") else "auto",
+            "timeout_keep_alive": 30,  # 客户端复用连接，空闲 30 秒后再关闭
+            # 无需 tcp_nodelay 选项：asyncio 和 uvloop 对接受的 TCP 连接默认启用 TCP_NODELAY
+            "limit_concurrency": self.limit_concurrency,
+            "backlog": 2048,
+        }
+
+        # 多进程模式
+        if self.workers > 1:
+            config["workers"] = self.workers
+            # 多进程模式下禁用自动重载
+            config["reload"] = False
+
+        # 只监视源码，避免每次写入音频、缓存或数据库文件都触发重载
+        if config["reload"]:
+            config["reload_dirs"] = [str(PROJECT_ROOT)]  # 已包含 src/
+            config["reload_excludes"] = self.reload_excludes()
+
+        # SSL 配置
+        if self.protocol == "https":
+            config["ssl_keyfile"] = self.ssl_keyfile
+            config["ssl_certfile"] = self.ssl_certfile
+
+        return config
+
+    @staticmethod
+    def reload_excludes() -> list:
+        # uvicorn 将已存在的目录路径作为排除目录，其余条目作为文件名通配符
+        # 服务按当前目录写入 api_outputs，因此同时排除项目目录和当前目录下的同名目录
+        names = RELOAD_EXCLUDE_DIRS + [d for d in [os.environ.get("VOXCPM_SPEAKER_CACHE_DIR")] if d]
+        dirs = {(base / name).resolve() for base in (PROJECT_ROOT, Path.cwd()) for name in names}
+        return sorted(str(d) for d in dirs if d.is_dir()) + RELOAD_EXCLUDE_PATTERNS
+
+    def print_banner(self, config: dict):
+        url = f"{self.protocol}://{self.host}:{self.port}"
+        print("=" * 60)
+        print("🚀 启动 VoxCPM LoRA TTS API 服务")
+        print("=" * 60)
+        print(f"📍 服务地址: {url}")
+        print(f"📝 API 文档: {url}/docs")
+        print(f"📊 OpenAPI: {url}/openapi.json")
+        print(f"🔧 工作进程: {self.workers}")
+        print(f"⚡ 事件循环: {config['loop']}, HTTP 解析: {config['http']}")
+        print(f"📋 日志级别: {self.log_level}")
+        if self.dev:
+            print("🛠️  开发模式: 已启用")
+        if self.protocol == "https":
+            print("🔒 HTTPS: 已启用")
+        print("=" * 60)
+
 
 def main():
+    defaults = ApiConfig.from_env()
+
     parser = argparse.ArgumentParser(
         description="启动 VoxCPM LoRA TTS API 服务",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -22,94 +128,73 @@ def main():
   python start_api.py --host 127.0.0.1         # 仅本地访问
   python start_api.py --workers 4              # 多进程模式
   python start_api.py --dev                    # 开发模式 (启用热重载)
+
+各选项也可通过环境变量设置，如 VOXCPM_API_PORT=8080、VOXCPM_API_DEV=1
         """
     )
 
     parser.add_argument(
         "--host",
-        default="0.0.0.0",
-        help="服务器地址 (默认: 0.0.0.0，所有网络接口)"
+        default=defaults.host,
+        help=f"服务器地址 (默认: {defaults.host}，所有网络接口)"
     )
 
     parser.add_argument(
         "--port",
         type=int,
-        default=8000,
-        help="服务器端口 (默认: 8000)"
+        default=defaults.port,
+        help=f"服务器端口 (默认: {defaults.port})"
     )
 
     parser.add_argument(
         "--workers",
         type=int,
-        default=1,
-        help="工作进程数 (默认: 1)"
+        default=defaults.workers,
+        help=f"工作进程数 (默认: {defaults.workers}；每个进程都会在所有 GPU 上加载模型，且未完成的任务状态只保存在提交它的进程中)"
     )
 
     parser.add_argument(
         "--dev",
         action="store_true",
+        default=defaults.dev,
         help="开发模式，启用自动重载"
     )
 
     parser.add_argument(
         "--log-level",
         choices=["critical", "error", "warning", "info", "debug"],
-        default="info",
-        help="日志级别 (默认: info)"
+        default=defaults.log_level,
+        help=f"日志级别 (默认: {defaults.log_level})"
+    )
+
+    parser.add_argument(
+        "--limit-concurrency",
+        type=int,
+        default=defaults.limit_concurrency,
+        help=f"最大并发连接数，超出时返回 503 (默认: {defaults.limit_concurrency})"
     )
 
     parser.add_argument(
         "--ssl-keyfile",
+        default=defaults.ssl_keyfile,
         help="SSL 私钥文件路径 (启用 HTTPS)"
     )
 
     parser.add_argument(
         "--ssl-certfile",
+        default=defaults.ssl_certfile,
         help="SSL 证书文件路径 (启用 HTTPS)"
     )
 
-    args = parser.parse_args()
+    api_config = ApiConfig.from_args(parser.parse_args())
 
     # 确保输出目录存在
     os.makedirs("api_outputs", exist_ok=True)
 
-    # 配置参数
-    config = {
-        "app": "api_server:app",
-        "host": args.host,
-        "port": args.port,
-        "log_level": args.log_level,
-        "reload": args.dev,
-    }
-
-    # 多进程模式
-    if args.workers > 1:
-        config["workers"] = args.workers
-        # 多进程模式下禁用自动重载
-        config["reload"] = False
-
-    # SSL 配置
-    if args.ssl_keyfile and args.ssl_certfile:
-        config["ssl_keyfile"] = args.ssl_keyfile
-        config["ssl_certfile"] = args.ssl_certfile
-        protocol = "https"
-    else:
-        protocol = "http"
+    config = api_config.uvicorn_kwargs()
 
     # 显示启动信息
-    print("=" * 60)
-    print("🚀 启动 VoxCPM LoRA TTS API 服务")
-    print("=" * 60)
-    print(f"📍 服务地址: {protocol}://{args.host}:{args.port}")
-    print(f"📝 API 文档: {protocol}://{args.host}:{args.port}/docs")
-    print(f"📊 OpenAPI: {protocol}://{args.host}:{args.port}/openapi.json")
-    print(f"🔧 工作进程: {args.workers}")
-    print(f"📋 日志级别: {args.log_level}")
-    if args.dev:
-        print("🛠️  开发模式: 已启用")
-    if protocol == "https":
-        print("🔒 HTTPS: 已启用")
-    print("=" * 60)
+    api_config.print_banner(config)
 
     # 启动服务
     try:
@@ -121,4 +206,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
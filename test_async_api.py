@@ -8,15 +8,48 @@
 3. 下载生成的音频文件
 """
 
-import requests
+import asyncio
+import hashlib
+import importlib.util
 import time
 import json
 import os
 from datetime import datetime
 
+import httpx
+
+try:
+    import websockets
+except ImportError:
+    websockets = None  # 未安装时使用 HTTP 长轮询
+
+try:
+    import orjson  # 直接解析响应字节，比 response.json() 更快
+except ImportError:
+    orjson = None
+
+HTTP2 = importlib.util.find_spec("h2") is not None  # 安装 h2 后 httpx 使用 HTTP/2
+
 # API配置
 BASE_URL = "http://localhost:8000"  # 本地访问
 # BASE_URL = "http://192.168.1.100:8000"  # 局域网访问 (请替换为实际IP)
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 下载时每次读取 1 MiB
+
+
+def parse_json(payload):
+    """解析 JSON 响应或 WebSocket 消息，已安装 orjson 时使用 orjson"""
+    if isinstance(payload, httpx.Response):
+        return orjson.loads(payload.content) if orjson else payload.json()
+    return orjson.loads(payload) if orjson else json.loads(payload)
+
+def make_client():
+    """共享异步客户端：连接池复用 TCP 连接，多个请求可并发进行"""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        transport=httpx.AsyncHTTPTransport(http2=HTTP2, retries=3,
+                                           limits=httpx.Limits(max_connections=16)),
+        headers={"Accept-Encoding": "gzip, deflate"}
+    )
 
 def print_separator(title):
     """打印分隔线"""
@@ -24,12 +57,12 @@ def print_separator(title):
     print(f"🔹 {title}")
     print("=" * 60)
 
-def test_api_health():
+async def test_api_health(client):
     """测试API健康状态"""
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=30)
+        response = await client.get("/health", timeout=30)
         if response.status_code == 200:
-            data = response.json()
+            data = parse_json(response)
             print(f"✅ API状态: {data['status']}")
             print(f"   模型已加载: {'是' if data['model_loaded'] else '否'}")
             return True
@@ -40,12 +73,12 @@ def test_api_health():
         print(f"❌ 无法连接到API: {e}")
         return False
 
-def list_available_loras():
+async def list_available_loras(client):
     """列出可用的LoRA模型"""
     try:
-        response = requests.get(f"{BASE_URL}/loras", timeout=60)
+        response = await client.get("/loras", timeout=60)
         if response.status_code == 200:
-            data = response.json()
+            data = parse_json(response)
             loras = data.get('loras', [])
             print(f"📋 可用LoRA模型 ({len(loras)}个):")
             for i, lora in enumerate(loras, 1):
@@ -58,7 +91,20 @@ def list_available_loras():
         print(f"❌ 获取LoRA列表出错: {e}")
         return []
 
-def submit_async_task(text, lora_name=None, steps=15, cfg_scale=2.0):
+async def warmup_model(client, lora_name=None):
+    """预热模型，使后续计时不包含首次加载"""
+    try:
+        params = {"lora": lora_name} if lora_name else {}
+        response = await client.get("/warmup", params=params, timeout=600)
+        if response.status_code == 200:
+            data = parse_json(response)
+            print(f"🔥 预热完成 (LoRA: {lora_name or '无'}): {data['seconds']}秒, GPU {data['warmed_gpus']}")
+        else:
+            print(f"⚠️  预热失败 (LoRA: {lora_name or '无'}): HTTP {response.status_code}")
+    except Exception as e:
+        print(f"⚠️  预热出错: {e}")
+
+async def submit_async_task(client, text, lora_name=None, steps=15, cfg_scale=2.0):
     """提交异步语音合成任务"""
     print_separator("提交异步任务")
 
@@ -77,10 +123,10 @@ def submit_async_task(text, lora_name=None, steps=15, cfg_scale=2.0):
     print(f"🔄 模式: 异步")
 
     try:
-        response = requests.post(f"{BASE_URL}/synthesize", json=request_data, timeout=120)
+        response = await client.post("/synthesize", json=request_data, timeout=120)
 
         if response.status_code == 200:
-            result = response.json()
+            result = parse_json(response)
             if result.get("status") == "submitted":
                 task_id = result["task_id"]
                 estimated_time = result.get("estimated_time", 0)
@@ -93,7 +139,7 @@ def submit_async_task(text, lora_name=None, steps=15, cfg_scale=2.0):
                 print(f"❌ 任务提交失败: {result.get('message', '未知错误')}")
                 return None
         else:
-            error_detail = response.json().get("detail", "未知错误")
+            error_detail = parse_json(response).get("detail", "未知错误")
             print(f"❌ 请求失败 ({response.status_code}): {error_detail}")
             return None
 
@@ -101,64 +147,113 @@ def submit_async_task(text, lora_name=None, steps=15, cfg_scale=2.0):
         print(f"❌ 提交任务时出错: {e}")
         return None
 
-def poll_task_status(task_id, interval=3, timeout=600):
-    """轮询任务状态"""
-    print_separator(f"监控任务状态 (ID: {task_id})")
-
-    start_time = time.time()
+def show_task_update(task_status, start_time, last_progress):
+    """打印一次状态更新；任务结束时返回 (True, 结果)"""
+    status = task_status["status"]
+    progress = task_status.get("progress", 0) * 100
+    message = task_status.get("message", "")
+
+    # 只在进度更新时显示
+    if progress != last_progress or status in ["completed", "failed"]:
+        elapsed = int(time.time() - start_time)
+        print(f"⏰ {elapsed:3d}s | 状态: {status:10s} | 进度: {progress:5.1f}% | {message}")
+
+    # 检查任务是否完成
+    if status == "completed":
+        print(f"\n🎉 任务完成!")
+        print(f"   处理时间: {int(time.time() - start_time)}秒")
+        print(f"   音频文件: {task_status.get('audio_path', '未知')}")
+        return True, task_status
+
+    elif status == "failed":
+        error_msg = task_status.get("error", "未知错误")
+        print(f"\n❌ 任务失败: {error_msg}")
+        return True, None
+
+    return False, None
+
+async def follow_task_feed(task_id, start_time):
+    """通过 /ws/tasks 接收任务状态推送，服务端只在状态或进度变化时发送"""
+    ws_url = BASE_URL.replace("http", "ws", 1) + f"/ws/tasks?task_ids={task_id}"
+    task_status = {"task_id": task_id, "progress": 0}
     last_progress = -1
 
-    print("⏱️  开始监控任务进度...")
-    print(f"   查询间隔: {interval}秒")
-    print(f"   超时时间: {timeout}秒")
-    print()
+    async with websockets.connect(ws_url) as ws:
+        async for message in ws:
+            # 推送的是变化的字段，合并到本地状态
+            task_status.update(parse_json(message))
+            done, result = show_task_update(task_status, start_time, last_progress)
+            if done:
+                return result
+            last_progress = task_status.get("progress", 0) * 100
+    raise ConnectionError("任务推送连接已关闭")
+
+async def long_poll_task_status(client, task_id, start_time, interval, timeout):
+    """HTTP 长轮询：服务端在任务状态变化时立即返回"""
+    last_progress = -1
+    last_version = None
 
     while True:
         try:
-            response = requests.get(f"{BASE_URL}/task/{task_id}", timeout=10)
+            params = {"timeout": 25}
+            if last_version:
+                params["since"] = last_version
+            response = await client.get(f"/task/{task_id}/wait", params=params, timeout=35)
 
             if response.status_code == 200:
-                task_status = response.json()
-                status = task_status["status"]
-                progress = task_status.get("progress", 0) * 100
-                message = task_status.get("message", "")
-                created_at = task_status.get("created_at", "")
-                updated_at = task_status.get("updated_at", "")
-
-                # 只在进度更新时显示
-                if progress != last_progress or status in ["completed", "failed"]:
-                    elapsed = int(time.time() - start_time)
-                    print(f"⏰ {elapsed:3d}s | 状态: {status:10s} | 进度: {progress:5.1f}% | {message}")
-
-                # 检查任务是否完成
-                if status == "completed":
-                    print(f"\n🎉 任务完成!")
-                    print(f"   处理时间: {int(time.time() - start_time)}秒")
-                    print(f"   音频文件: {task_status.get('audio_path', '未知')}")
-                    return task_status
-
-                elif status == "failed":
-                    error_msg = task_status.get("error", "未知错误")
-                    print(f"\n❌ 任务失败: {error_msg}")
-                    return None
-
-                last_progress = progress
+                last_version = response.headers.get("ETag")
+                task_status = parse_json(response)
+                done, result = show_task_update(task_status, start_time, last_progress)
+                if done:
+                    return result
+                last_progress = task_status.get("progress", 0) * 100
 
             else:
                 print(f"❌ 查询任务状态失败: {response.status_code}")
+                await asyncio.sleep(interval)
 
             # 检查超时
             if time.time() - start_time > timeout:
                 print(f"\n⏰ 任务监控超时 ({timeout}秒)")
                 return None
 
-            time.sleep(interval)
-
         except Exception as e:
             print(f"❌ 查询状态时出错: {e}")
-            time.sleep(interval)
+            await asyncio.sleep(interval)
+
+async def poll_task_status(client, task_id, interval=3, timeout=600):
+    """监控任务状态（优先使用 WebSocket 推送，不可用时回退到 HTTP 长轮询）"""
+    print_separator(f"监控任务状态 (ID: {task_id})")
+
+    start_time = time.time()
+
+    print("⏱️  开始监控任务进度...")
+    print(f"   出错重试间隔: {interval}秒")
+    print(f"   超时时间: {timeout}秒")
+    print()
 
-def download_audio_file(audio_path, save_path=None):
+    if websockets is not None:
+        try:
+            return await asyncio.wait_for(follow_task_feed(task_id, start_time), timeout)
+        except asyncio.TimeoutError:
+            print(f"\n⏰ 任务监控超时 ({timeout}秒)")
+            return None
+        except (OSError, websockets.exceptions.WebSocketException) as e:
+            print(f"⚠️  WebSocket 推送不可用 ({e})，改用 HTTP 长轮询")
+
+    return await long_poll_task_status(client, task_id, start_time, interval, timeout)
+
+def file_digest(path):
+    """计算文件的 BLAKE2b 摘要，内存占用与文件大小无关"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(f, "blake2b").hexdigest()
+        digest = hashlib.blake2b()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+        return digest.hexdigest()
+
+async def download_audio_file(client, audio_path, save_path=None):
     """下载音频文件"""
     print_separator("下载音频文件")
 
@@ -177,45 +272,68 @@ def download_audio_file(audio_path, save_path=None):
     print(f"   保存路径: {save_path}")
     print(f"   下载地址: {download_url}")
 
-    try:
-        response = requests.get(download_url, timeout=30, stream=True)
-
-        if response.status_code == 200:
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            print(f"\r   下载进度: {progress:.1f}%", end='', flush=True)
-
-            print()  # 换行
+    # 已接收的数据先写入 .part 文件，中断后用 Range 请求从断点继续
+    part_path = f"{save_path}.part"
+    attempts = 3
+    for attempt in range(1, attempts + 1):
+        downloaded = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={downloaded}-"} if downloaded else {}
+        try:
+            async with client.stream("GET", f"/download/{filename}", headers=headers, timeout=30) as response:
+                if response.status_code == 416:
+                    pass  # 上次已接收全部数据
+                elif response.status_code in (200, 206):
+                    if response.status_code == 206:
+                        total_size = int(response.headers.get('content-range', '/0').rsplit('/', 1)[-1])
+                        mode = 'ab'
+                        print(f"   从 {downloaded:,} 字节处继续下载")
+                    else:
+                        # 服务端返回了完整文件，从头开始
+                        total_size = int(response.headers.get('content-length', 0))
+                        downloaded = 0
+                        mode = 'wb'
+                    last_print = 0.0
+
+                    with open(part_path, mode) as f:
+                        if hasattr(os, "posix_fadvise"):
+                            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            downloaded += len(chunk)
+                            # 进度最多每 50ms 刷新一次，避免每个数据块都写终端
+                            now = time.monotonic()
+                            if total_size > 0 and now - last_print > 0.05:
+                                last_print = now
+                                print(f"\r   下载进度: {downloaded / total_size * 100:.1f}%", end='', flush=True)
+
+                    if total_size > 0:
+                        print(f"\r   下载进度: {downloaded / total_size * 100:.1f}%", end='')
+                    print()  # 换行
+                else:
+                    print(f"❌ 下载失败: HTTP {response.status_code}")
+                    return False
+
+            os.replace(part_path, save_path)
             file_size = os.path.getsize(save_path)
             print(f"✅ 下载完成!")
             print(f"   文件大小: {file_size:,} 字节 ({file_size/1024/1024:.1f} MB)")
+            print(f"   BLAKE2b: {file_digest(save_path)}")
             return True
 
-        else:
-            print(f"❌ 下载失败: HTTP {response.status_code}")
-            return False
+        except Exception as e:
+            print(f"\n❌ 下载时出错 (第 {attempt}/{attempts} 次): {e}")
 
-    except Exception as e:
-        print(f"❌ 下载时出错: {e}")
-        return False
+    return False
 
-def test_task_management():
+async def test_task_management(client):
     """测试任务管理功能"""
     print_separator("任务管理测试")
 
     try:
         # 获取所有任务
-        response = requests.get(f"{BASE_URL}/tasks", timeout=10)
+        response = await client.get("/tasks", timeout=10)
         if response.status_code == 200:
-            data = response.json()
+            data = parse_json(response)
             print(f"📊 任务统计:")
             print(f"   总任务数: {data['total']}")
             print(f"   正在处理: {data['processing']}/{data['max_concurrent']}")
@@ -227,86 +345,95 @@ def test_task_management():
                     task_id = task['task_id']
                     status = task['status']
                     progress = task.get('progress', 0) * 100
-                    created = task.get('created_at', '')[:19]  # 去掉毫秒
-                    print(f"   {task_id} | {status:10s} | {progress:5.1f}% | {created}")
+                    updated = task.get('updated_at', '')[:19]  # 去掉毫秒
+                    print(f"   {task_id} | {status:10s} | {progress:5.1f}% | {updated}")
 
     except Exception as e:
         print(f"❌ 任务管理测试失败: {e}")
 
-def main():
-    """主测试函数"""
-    print("🚀 VoxCPM 异步API测试脚本")
-    print("🎯 目标: 测试完整的异步语音合成工作流程\n")
-
-    # 1. 测试API连接
-    if not test_api_health():
-        print("❌ API服务不可用，请确保服务已启动")
-        return
-
-    # 2. 查看可用LoRA模型
-    loras = list_available_loras()
-
-    # 3. 测试任务管理
-    test_task_management()
-
-    # 4. 提交异步任务
-    # 使用较长的文本来测试异步处理
-    test_texts = [
-        {
-            "text": "欢迎使用VoxCPM语音合成系统。这是一个测试文本，用于演示异步语音合成功能。" * 3,
-            "lora": "lora1" if "lora1" in loras else None,
-            "steps": 12
-        },
-        {
-            "text": "Hello, this is a test of the VoxCPM async TTS system. " * 5,
-            "lora": None,
-            "steps": 10
-        }
-    ]
-
-    # 选择第一个测试用例
-    test_case = test_texts[0]
-
-    task_id = submit_async_task(
+async def submit_and_wait(client, index, test_case):
+    """提交一个测试用例，等待完成并下载音频；成功返回 True"""
+    task_id = await submit_async_task(
+        client,
         text=test_case["text"],
         lora_name=test_case["lora"],
         steps=test_case["steps"]
     )
 
     if not task_id:
-        print("❌ 无法提交任务，测试终止")
-        return
+        print(f"❌ 测试用例 {index} 无法提交任务")
+        return False
 
-    # 5. 监控任务状态
-    task_result = poll_task_status(task_id, interval=3, timeout=300)
+    # 监控任务状态
+    task_result = await poll_task_status(client, task_id, interval=3, timeout=300)
 
     if not task_result:
-        print("❌ 任务未成功完成")
-        return
-
-    # 6. 下载音频文件
-    audio_path = task_result.get("audio_path")
-    success = download_audio_file(audio_path)
-
-    if success:
-        print("\n" + "=" * 60)
-        print("🎉 异步API测试完成!")
-        print("✅ 所有步骤都成功执行")
-        print("✅ 音频文件已下载")
-        print("=" * 60)
-    else:
-        print("\n❌ 音频下载失败")
-
-    # 7. 最终任务状态检查
-    print_separator("最终状态检查")
-    test_task_management()
+        print(f"❌ 测试用例 {index} 任务未成功完成")
+        return False
+
+    # 下载音频文件
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return await download_audio_file(client, task_result.get("audio_path"),
+                                     f"tts_output_{timestamp}_{index}.mp3")
+
+async def main():
+    """主测试函数"""
+    print("🚀 VoxCPM 异步API测试脚本")
+    print("🎯 目标: 测试完整的异步语音合成工作流程\n")
+
+    async with make_client() as client:
+        # 1-3. 并发执行只读检查：API连接、可用LoRA模型、任务管理
+        healthy, loras, _ = await asyncio.gather(
+            test_api_health(client),
+            list_available_loras(client),
+            test_task_management(client)
+        )
+        if not healthy:
+            print("❌ API服务不可用，请确保服务已启动")
+            return
+
+        # 4. 提交异步任务
+        # 使用较长的文本来测试异步处理
+        test_texts = [
+            {
+                "text": "欢迎使用VoxCPM语音合成系统。这是一个测试文本，用于演示异步语音合成功能。" * 3,
+                "lora": "lora1" if "lora1" in loras else None,
+                "steps": 12
+            },
+            {
+                "text": "Hello, this is a test of the VoxCPM async TTS system. " * 5,
+                "lora": None,
+                "steps": 10
+            }
+        ]
+
+        # 预热用到的模型，使下面的流程不包含冷启动时间
+        await asyncio.gather(*(warmup_model(client, lora)
+                               for lora in {test_case["lora"] for test_case in test_texts}))
+
+        # 5-6. 所有测试用例并发提交、监控并下载
+        results = await asyncio.gather(*(submit_and_wait(client, i, test_case)
+                                         for i, test_case in enumerate(test_texts, 1)))
+
+        if all(results):
+            print("\n" + "=" * 60)
+            print("🎉 异步API测试完成!")
+            print("✅ 所有步骤都成功执行")
+            print("✅ 音频文件已下载")
+            print("=" * 60)
+        else:
+            print(f"\n❌ {results.count(False)}/{len(results)} 个测试用例失败")
+
+        # 7. 最终任务状态检查
+        print_separator("最终状态检查")
+        await test_task_management(client)
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         print("\n\n⚠️  测试被用户中断")
     except Exception as e:
         print(f"\n❌ 测试过程中出现未预期的错误: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
@@ -5,25 +5,54 @@
 帮助用户检查网络配置和连接状态
 """
 
+import errno
+import select
 import socket
+import time
 import requests
 import subprocess
 import platform
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # 未安装时回退到系统命令
 
 def get_local_ip():
     """获取本机局域网IP地址"""
     try:
-        # 创建一个连接到外网的socket来获取本地IP
+        # 创建一个连接到外网的socket来获取本地IP（UDP connect 不发送数据，只选择出口网卡）
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
         local_ip = s.getsockname()[0]
         s.close()
         return local_ip
     except Exception:
-        return None
+        pass
+
+    if psutil is not None:
+        # 无默认路由时读取网卡地址，取第一个已启用的非回环、非链路本地 IPv4 地址
+        stats = psutil.net_if_stats()
+        for name, addrs in psutil.net_if_addrs().items():
+            if name in stats and not stats[name].isup:
+                continue
+            for addr in addrs:
+                if (addr.family == socket.AF_INET and not addr.address.startswith("127.")
+                        and not addr.address.startswith("169.254.")):
+                    return addr.address
+    return None
 
 def get_network_interfaces():
     """获取网络接口信息"""
+    if psutil is not None:
+        lines = []
+        for name, addrs in psutil.net_if_addrs().items():
+            for addr in addrs:
+                if addr.family in (socket.AF_INET, socket.AF_INET6):
+                    lines.append(f"{name}: {addr.address}")
+        return "\n".join(lines)
+
     try:
         system = platform.system().lower()
         if system == "windows":
@@ -34,16 +63,57 @@ def get_network_interfaces():
     except Exception:
         return "无法获取网络接口信息"
 
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1")
+LOOPBACK_TIMEOUT = 0.2  # 本机连接若能成功会在毫秒内完成，无需等待数秒
+
+CONNECT_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN,
+                       getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)}
+
+def test_ports(targets, timeout=3.0):
+    """同时测试多个 (host, port) 是否可访问
+
+    所有连接以非阻塞方式同时发起，再用 select 等待结果，无需为每个目标创建线程。
+    探测只完成握手、不发送数据，因此不受 Nagle 算法和延迟 ACK 影响。
+    返回 {(host, port): 是否可连接}。
+    """
+    results = {target: False for target in targets}
+    pending = {}
+    for host, port in targets:
+        try:
+            family, sock_type, proto, _, addr = socket.getaddrinfo(
+                host, port, socket.AF_INET, socket.SOCK_STREAM)[0]
+            sock = socket.socket(family, sock_type, proto)
+        except OSError:
+            continue
+        sock.setblocking(False)
+        err = sock.connect_ex(addr)
+        if err in CONNECT_IN_PROGRESS:
+            pending[sock] = (host, port)
+            continue
+        results[(host, port)] = err == 0
+        sock.close()
+
+    deadline = time.monotonic() + timeout
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # 连接完成（成功或失败）时套接字变为可写；Windows 上失败的连接出现在异常列表中
+        socks = list(pending)
+        _, writable, failed = select.select([], socks, socks, remaining)
+        for sock in set(writable) | set(failed):
+            target = pending.pop(sock)
+            results[target] = sock not in failed and sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+            sock.close()
+
+    for sock in pending:
+        sock.close()
+    return results
+
 def test_port(host, port):
     """测试端口是否可访问"""
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return result == 0
-    except Exception:
-        return False
+    timeout = LOOPBACK_TIMEOUT if host in LOOPBACK_HOSTS else 3
+    return test_ports([(host, port)], timeout)[(host, port)]
 
 def test_api_endpoint(url):
     """测试API端点是否可访问"""
@@ -82,25 +152,33 @@ def main():
     if local_ip:
         hosts_to_test.append((local_ip, "局域网IP"))
 
+    base_urls = [
+        ("http://localhost:8000", "本地访问"),
+    ]
+
+    if local_ip:
+        base_urls.append((f"http://{local_ip}:8000", "局域网访问"))
+
+    # 各项探测互不依赖，同时进行：总耗时取决于最慢的一项而不是所有耗时之和
+    # HTTP 请求在线程池中进行，端口则在当前线程中探测；本机地址使用短超时，局域网地址使用默认超时
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        api_results = [executor.submit(test_api_endpoint, url) for url, _ in base_urls]
+        port_results = test_ports([(host, port) for host, _ in hosts_to_test if host in LOOPBACK_HOSTS],
+                                  LOOPBACK_TIMEOUT)
+        port_results.update(test_ports([(host, port) for host, _ in hosts_to_test if host not in LOOPBACK_HOSTS]))
+
     print(f"\n🔌 端口 {port} 连接测试:")
     print("-" * 40)
     for host, desc in hosts_to_test:
-        status = "✅ 可连接" if test_port(host, port) else "❌ 无法连接"
+        status = "✅ 可连接" if port_results[(host, port)] else "❌ 无法连接"
         print(f"  {host:15} ({desc}): {status}")
 
     # API端点测试
     print(f"\n🚀 API端点测试:")
     print("-" * 40)
 
-    base_urls = [
-        ("http://localhost:8000", "本地访问"),
-    ]
-
-    if local_ip:
-        base_urls.append((f"http://{local_ip}:8000", "局域网访问"))
-
-    for url, desc in base_urls:
-        is_available, result = test_api_endpoint(url)
+    for (url, desc), future in zip(base_urls, api_results):
+        is_available, result = future.result()
         if is_available:
             print(f"  {desc:10} ({url}): ✅ 正常")
             print(f"    - 状态: {result.get('status', 'unknown')}")